@@ -1,64 +1,80 @@
 from flask import Flask, render_template, request, jsonify
-from openai import OpenAI
+import json
 from PIL import Image
 import io, os, base64
 from flask_cors import CORS
-# from whatsapp_bot import send_whatsapp_message
+from whatsapp_bot import send_whatsapp_message
 from flasgger import Swagger
-
-import json
-from bson import ObjectId
-from datetime import datetime
-
-from encoder import MongoJsonEncoder
+from twilio.request_validator import RequestValidator
+
+from blob_store import InvalidImage
+from cache import TieredCache, TTLCache
+from config import (ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL, ELECTION_INFO_TOP_K, TRANSLATION_CACHE_SIZE,
+                    TRANSLATION_CACHE_TTL, TRANSLATION_FALLBACK_LIMIT, TRANSLATION_FALLBACK_WORKERS,
+                    WHATSAPP_DEDUPE, WHATSAPP_DEDUPE_TTL, WHATSAPP_QUEUE_SIZE, WHATSAPP_WEBHOOK_URL,
+                    WHATSAPP_WORKERS, db)
+from decorators import validate_schema
+import election_info
+from encoder import MongoJSONProvider
+from indexes import ensure_indexes
+from llm_gateway import LLMUnavailable, gateway
+from schema import TranslateBatchSchema
+from translation_memory import MongoTranslationStore, TranslationMemory
+from whatsapp_replies import MemoryMessageLog, MongoMessageLog, WhatsAppReplies
+from workers import BoundedExecutor, Overloaded
+import model
 from routes_accreditation import routes_accreditation
 from routes_authentication import routes_authentication
 from routes_general_data import routes_general_data
 
-# Custom JSON encoder to handle ObjectId & datetime
-class CustomJSONEncoder(json.JSONEncoder):
-    """JSON Encoder that converts datetime objects to ISO format strings."""
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        elif isinstance(obj, datetime):
-            return obj.isoformat()
-        # Let the base class default method raise the TypeError
-        return super(CustomJSONEncoder, self).default(obj)
-    
 app = Flask(__name__)
 CORS(app)  # This will enable CORS for all routes
 swagger = Swagger(app)
 
-# Set the custom JSON encoder for the Flask app
-# app.json_encoder = CustomJSONEncoder
-app.json = MongoJsonEncoder(app)
+# Serialize ObjectId, datetime & Decimal128 in every response
+app.json = MongoJSONProvider(app)
 
 app.register_blueprint(routes_accreditation)
 app.register_blueprint(routes_authentication)
 app.register_blueprint(routes_general_data)
-    
-OPENAI_KEY = os.getenv("OPENAI_KEY")
 
-# Set up your OpenAI API key
-openai_client = OpenAI(
-    # This is the default and can be omitted
-    api_key= os.getenv("OPENAI_KEY"),
-)
-THIS_MODEL = "gpt-4o-mini"
+ensure_indexes()
+
+# Model calls go through llm_gateway; when it gives up, answer 503 instead of 500
+@app.errorhandler(LLMUnavailable)
+def llm_unavailable(e):
+    return jsonify({"message": str(e)}), 503, {'Retry-After': '5'}
+
+# Images the OCR path cannot read or does not accept are the client's error
+@app.errorhandler(InvalidImage)
+def invalid_image(e):
+    return jsonify({"message": str(e)}), 400
 
 def encode_image(image_file):
     return base64.b64encode(image_file.read()).decode('utf-8')
 
 
-# Read the .txt file content
-ELECTION_INFO = ""
-with open('LLM_election_info.txt', 'r') as file:
-    ELECTION_INFO = file.read()
+# Index the .txt file content by section; each question gets its top sections
+election_info_index = election_info.load_index('LLM_election_info.txt')
+
+# Common questions ("what time do polls open") are answered from here
+answer_cache = TieredCache(TTLCache(maxsize=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL))
 
 def answer_based_on_election_info(user_chat):
-    response = openai_client.chat.completions.create(
-        model=THIS_MODEL,
+    question = election_info.normalize_question(user_chat)
+    if not question:
+        return election_info.NO_ANSWER
+    return answer_cache.get_or_compute(f"{gateway.model}:{question}", lambda: request_answer(user_chat))
+
+def request_answer(user_chat):
+    sections = election_info_index.search(user_chat, k=ELECTION_INFO_TOP_K)
+    if not sections:
+        # nothing in the document shares a word with the question
+        return election_info.NO_ANSWER
+    context = "\n\n".join(sections)
+
+    return gateway.complete(
+        'election_qa',
         messages=[
             {
                 "role": "system",
@@ -67,21 +83,21 @@ def answer_based_on_election_info(user_chat):
             {
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": f"{ELECTION_INFO}\n\nPlease use the information above to answer the user chat as concise as possible. User chat: {user_chat}.\n\nIf the user chat is not related to the election info, just return a sentence letting the user know you don't have an answer."},
+                    {"type": "text", "text": f"{context}\n\nPlease use the information above to answer the user chat as concise as possible. User chat: {user_chat}.\n\nIf the user chat is not related to the election info, just return a sentence letting the user know you don't have an answer."},
                 ]
             }
         ],
         max_tokens=300
     )
 
-    result = response.choices[0].message.content
-    return result
-
 
 # Function to translate input_text to hausa:
 def translate_text_to_hausa(input_text):
-    response = openai_client.chat.completions.create(
-        model=THIS_MODEL,
+    return translation_memory.translate(input_text, "Hausa")
+
+def request_translation(input_text, language):
+    return gateway.complete(
+        'translate',
         messages=[
             {
                 "role": "system",
@@ -90,41 +106,51 @@ def translate_text_to_hausa(input_text):
             {
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": f"Translate {input_text} to Hausa. Just return the hausa translation."},
+                    {"type": "text", "text": f"Translate {input_text} to {language}. Just return the {language.lower()} translation."},
                 ]
             }
         ],
         max_tokens=300
     )
 
-    result = response.choices[0].message.content
-    return result
-
-
-def decode_image_to_ocr(base64_image):
-    # Send the request to the OpenAI API
-    response = openai_client.chat.completions.create(
-        model=THIS_MODEL,
+# Helper function to translate many strings in one model call; None when the
+# reply is not one translation per string
+def request_translations(texts, language):
+    reply = gateway.complete(
+        'translate_batch',
         messages=[
             {
                 "role": "system",
-                "content": "You are a cool image analyst required for OCR."
+                "content": "You are a cool chat bot."
             },
             {
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": "Extract in json format the VIN, DOB and full name if it's a Voter's card. If not, just say \"No Voter ID\". Please just the json itself, no markdown or newlines or escape characters"},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                    {"type": "text", "text": f"Translate each string in this JSON array to {language}: {json.dumps(texts, ensure_ascii=False)}\n\nReturn a JSON object {{\"translations\": [...]}} with the translations in the same order."},
                 ]
             }
         ],
-        max_tokens=300
+        response_format={"type": "json_object"},
+        max_tokens=min(16000, 300 * len(texts))
     )
 
-    # Extract the description
-    description = response.choices[0].message.content
-
-    return description
+    try:
+        translations = json.loads(reply)['translations']
+    except (TypeError, ValueError, KeyError):
+        return None
+    if not isinstance(translations, list) or not all(isinstance(t, str) for t in translations):
+        return None
+    return translations
+
+# UI labels and FAQ text repeat; each is translated by the model once
+translation_memory = TranslationMemory(
+    TTLCache(maxsize=TRANSLATION_CACHE_SIZE, ttl=TRANSLATION_CACHE_TTL),
+    MongoTranslationStore(db.translations),
+    translate=request_translation,
+    translate_batch=request_translations,
+    executor=BoundedExecutor(TRANSLATION_FALLBACK_WORKERS, TRANSLATION_FALLBACK_LIMIT * 4, name='translation'),
+    fallback_limit=TRANSLATION_FALLBACK_LIMIT
+)
 
 @app.route('/')
 def home():
@@ -149,29 +175,12 @@ def extract_text():
         # Encode the image file as base64
         base64_image = encode_image(file.stream)
 
-        # Send the request to the OpenAI API
-        response = openai_client.chat.completions.create(
-            model=THIS_MODEL,
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a cool image analyst required for OCR."
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {"type": "text", "text": "Extract in json format the VIN, DOB and fullname if it's a Voter's card. If not, just return {'status': False}. Please just the json itself, no markdown or newlines or escape characters"},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                    ]
-                }
-            ],
-            max_tokens=300
-        )
-
-        # Extract the description
-        description = response.choices[0].message.content
+        # Cached, preprocessed OCR shared with accreditation
+        description = model.decode_image_to_ocr(base64_image, prompt='voter_card_status')
 
         return jsonify({"description": description})
+    except (LLMUnavailable, InvalidImage):
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -185,7 +194,7 @@ def upload_image():
 
     # Encode the decoded image back to base64 for the OCR function
     base64_image = base64.b64encode(image_data).decode('utf-8')
-    result = decode_image_to_ocr(base64_image)
+    result = model.decode_image_to_ocr(base64_image)
     print("Result:", result, type(result))
     try:
         result = dict(eval(result))
@@ -205,28 +214,84 @@ def upload_image():
 
     return jsonify({"message": "Image uploaded successfully!", "data": result}), 200
 
+@app.route('/ocr/cache-stats', methods=['GET'])
+def ocr_cache_stats():
+    return jsonify(model.ocr_cache.stats())
+
+@app.route('/llm/stats', methods=['GET'])
+def llm_stats():
+    return jsonify(gateway.stats())
+
+@app.route('/election-info/cache-stats', methods=['GET'])
+def answer_cache_stats():
+    return jsonify(answer_cache.stats())
+
 ##### Twilio Whatsapp Webhook:
+# Replies are answered and sent in the background; the webhook returns as soon
+# as the message is queued
+whatsapp_replies = WhatsAppReplies(
+    answer=answer_based_on_election_info,
+    send=send_whatsapp_message,
+    executor=BoundedExecutor(WHATSAPP_WORKERS, WHATSAPP_QUEUE_SIZE, name='whatsapp'),
+    log=MemoryMessageLog(WHATSAPP_DEDUPE_TTL) if WHATSAPP_DEDUPE == 'memory' else MongoMessageLog(db.whatsapp_messages)
+)
+
+# Helper function to check the X-Twilio-Signature header; skipped with the
+# stub client or when no auth token is configured
+def is_valid_twilio_request():
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+    if os.getenv("TWILIO_CLIENT") == "stub" or not auth_token:
+        return True
+    signature = request.headers.get('X-Twilio-Signature', '')
+    return RequestValidator(auth_token).validate(WHATSAPP_WEBHOOK_URL or request.url, request.form, signature)
+
 @app.route('/whatsapp_webhook', methods=['POST'])
 def whatsapp_webhook():
-    #print request.data
-    print('whatsapp_webhook:', request.get_data())
+    if not is_valid_twilio_request():
+        return jsonify({"success": False, "message": "Invalid signature"}), 403
+
+    message_sid = request.values.get('MessageSid', '').strip()
     incoming_msg = request.values.get('Body', '').strip()
     senderId = request.values.get('From', '').strip()
+    if not message_sid or not senderId or not incoming_msg:
+        return jsonify({"success": False, "message": "MessageSid, From and Body are required"}), 400
 
-    response_message = answer_based_on_election_info(incoming_msg)
-    # send_whatsapp_message(response_message, recipient=senderId)
+    try:
+        queued = whatsapp_replies.enqueue(message_sid, senderId, incoming_msg)
+    except Overloaded:
+        # Twilio retries, and the SID is still unseen
+        return jsonify({"success": False, "message": "Server busy, please retry shortly"}), 503, {'Retry-After': '2'}
+
+    return jsonify({"success": True, "duplicate": not queued}), 200
 
-    return jsonify({"success": True}), 200
+@app.route('/whatsapp_webhook/stats', methods=['GET'])
+def whatsapp_webhook_stats():
+    return jsonify(whatsapp_replies.stats())
 
 ##### Route to translate text to hausa:
 @app.route('/translate_to_hausa', methods=['POST'])
 def translate_to_hausa():
     data = request.get_json()
     input_text = data.get('text')
+    if not input_text:
+        return jsonify({"message": "Please provide text"}), 400
 
     response = translate_text_to_hausa(input_text)
 
     return jsonify({"text": response})
 
+##### Route to translate a whole screen of strings in one round trip; a
+##### string that could not be translated this time comes back as null:
+@app.route('/translate_to_hausa/batch', methods=['POST'])
+@validate_schema(TranslateBatchSchema())
+def translate_batch_to_hausa():
+    texts = request.get_json()['texts']
+    translations = translation_memory.translate_batch(texts, "Hausa")
+    return jsonify({"texts": translations})
+
+@app.route('/translate_to_hausa/stats', methods=['GET'])
+def translation_memory_stats():
+    return jsonify(translation_memory.stats())
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,209 @@
+"""Latency and throughput of the database-bound endpoints.
+
+    DATABASE_NAME=plateau_bench python benchmarks/endpoints.py [--requests 500] [--concurrency 8]
+        [--scenarios polling-units,dashboard,candidates,voters-data,manual-accreditation] [--url http://localhost:5000]
+
+Run it against a scratch database loaded by benchmarks/synthetic_data.py
+--load. Request parameters are drawn, with --seed, from a sample of that
+database's polling units and voters. Each scenario sends --requests requests
+from --concurrency threads and reports throughput and p50/p95/p99 latency.
+Without --url the app is driven in process through Flask's test client, with
+the stub OpenAI client. The manual-accreditation scenario writes accreditation
+records and images.
+"""
+import argparse
+import base64
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('OPENAI_CLIENT', 'stub')
+
+from config import db
+from voters import VIN_SUFFIX_LENGTH
+
+SCENARIOS = ['polling-units', 'dashboard', 'candidates', 'voters-data', 'manual-accreditation']
+SAMPLE_SIZE = 500
+# stands in for a ~20 KB phone photo; only the JPEG magic number is checked
+FAKE_JPEG = b'\xff\xd8\xff\xe0' + hashlib.sha256(b'bench').digest() * 640
+
+
+class InProcessClient:
+    def __init__(self):
+        from app import app
+        self.app = app
+        self.local = threading.local()
+
+    def request(self, method, path, body=None):
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.app.test_client()
+        response = self.local.client.open(path, method=method, json=body)
+        # reading the body drains streamed responses
+        return response.status_code, response.get_data()
+
+
+class HTTPClient:
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+def sample_fixtures():
+    units = list(db.polling_units.aggregate([
+        {'$match': {'lga': {'$type': 'string'}}},
+        {'$sample': {'size': SAMPLE_SIZE}},
+        {'$project': {'_id': 0, 'name': 1, 'ward': 1, 'lga': 1}}
+    ]))
+    voters = list(db.voters.aggregate([
+        {'$sample': {'size': SAMPLE_SIZE}},
+        {'$project': {'_id': 0, 'VIN': 1, 'polling_unit': 1}}
+    ]))
+    lgas = sorted({unit['lga'] for unit in units})
+    if not units or not voters:
+        sys.exit(f"No polling units or voters in database {db.name}; load benchmarks/synthetic_data.py output first")
+    return {'units': units, 'voters': voters, 'lgas': lgas}
+
+
+def query(path, **params):
+    return f"{path}?{urllib.parse.urlencode(params)}"
+
+
+# Each scenario sends one logical operation and returns its status codes
+def polling_units(client, rng, fixtures):
+    params = {'page': rng.randint(1, 20), 'limit': 50}
+    if rng.random() < 0.5:
+        params['lga'] = rng.choice(fixtures['lgas'])
+    return [client.request('GET', query('/polling-units', **params))[0]]
+
+
+def dashboard(client, rng, fixtures):
+    params = {'limit': 100}
+    if rng.random() < 0.5:
+        params['pollingUnit'] = rng.choice(fixtures['units'])['name']
+    status, body = client.request('GET', query('/accreditation-dashboard', **params))
+    statuses = [status]
+    next_cursor = json.loads(body).get('nextCursor') if status == 200 else None
+    if next_cursor:
+        # follow one page, as the dashboard's "load more" does
+        statuses.append(client.request('GET', query('/accreditation-dashboard', after=next_cursor, **params))[0])
+    return statuses
+
+
+def candidates(client, rng, fixtures):
+    return [client.request('GET', query('/candidates', page=rng.randint(1, 3), limit=50))[0]]
+
+
+def voters_data(client, rng, fixtures):
+    unit = rng.choice(fixtures['units'])
+    return [client.request('GET', query('/voters_data', polling_unit=unit['name'], ward=unit['ward'], lga=unit['lga']))[0]]
+
+
+def manual_accreditation(client, rng, fixtures):
+    voter = rng.choice(fixtures['voters'])
+    short_vin = voter['VIN'][-VIN_SUFFIX_LENGTH:]
+    status, _ = client.request('POST', '/manual-accreditation/step1', {'vin': short_vin, 'pollingUnit': voter['polling_unit']})
+    if status != 200:
+        return [status]
+    image = base64.b64encode(FAKE_JPEG).decode()
+    step2, _ = client.request('POST', '/manual-accreditation/step2', {
+        'vin': voter['VIN'], 'voterCardImage': image, 'faceCaptureImage': image
+    })
+    return [status, step2]
+
+
+SCENARIO_FUNCTIONS = {
+    'polling-units': polling_units,
+    'dashboard': dashboard,
+    'candidates': candidates,
+    'voters-data': voters_data,
+    'manual-accreditation': manual_accreditation,
+}
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run(client, scenario, fixtures, requests, concurrency, seed):
+    operation = SCENARIO_FUNCTIONS[scenario]
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def worker(worker_seed):
+        rng = random.Random(worker_seed)
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            statuses = operation(client, rng, fixtures)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if any(status >= 400 for status in statuses):
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=worker, args=(seed * 1000 + n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput': len(latencies) / elapsed,
+        'p50': percentile(latencies, 0.50),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500, help='operations per scenario')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--url', help='benchmark a running server instead of the app in process')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed operations per scenario')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    scenarios = args.scenarios.split(',')
+    unknown = set(scenarios) - set(SCENARIO_FUNCTIONS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    fixtures = sample_fixtures()
+    client = HTTPClient(args.url) if args.url else InProcessClient()
+    target = args.url or 'in process'
+    print(f"database {db.name}, {target}, {args.requests} operations per scenario, concurrency {args.concurrency}")
+    print(f"{'scenario':<22} {'ops':>6} {'errors':>6} {'ops/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for scenario in scenarios:
+        if args.warmup:
+            run(client, scenario, fixtures, args.warmup, min(args.concurrency, args.warmup), args.seed + 1)
+        result = run(client, scenario, fixtures, args.requests, args.concurrency, args.seed)
+        print(f"{scenario:<22} {result['requests']:>6} {result['errors']:>6} {result['throughput']:>8.1f} "
+              f"{result['p50'] * 1000:>7.1f}ms {result['p95'] * 1000:>7.1f}ms {result['p99'] * 1000:>7.1f}ms")
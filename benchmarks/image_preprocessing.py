@@ -0,0 +1,68 @@
+"""Size and latency of the pre-OCR image normalization.
+
+    python benchmarks/image_preprocessing.py [image ...]
+
+Without arguments a synthetic 4032x3024 phone-camera photo is used. For each
+image it reports the base64 payload before and after normalization and the
+time spent normalizing, inline and through the process pool.
+"""
+import base64
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+from image_preprocessing import get_executor, normalize_image
+
+ROUNDS = 5
+
+
+def synthetic_photo(width=4032, height=3024):
+    rng = random.Random(42)
+    image = Image.effect_noise((width, height), 40).convert('RGB')
+    draw = ImageDraw.Draw(image)
+    for _ in range(200):
+        x, y = rng.randrange(width), rng.randrange(height)
+        colour = tuple(rng.randrange(256) for _ in range(3))
+        draw.rectangle([x, y, x + rng.randrange(50, 600), y + rng.randrange(20, 200)], fill=colour)
+    output = io.BytesIO()
+    image.save(output, format='JPEG', quality=95)
+    return output.getvalue()
+
+
+def b64_size(data):
+    return len(base64.b64encode(data))
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def report(name, data):
+    (normalized, content_type), _ = timed(normalize_image, data)
+    inline = [timed(normalize_image, data)[1] for _ in range(ROUNDS)]
+    pool = [timed(lambda: get_executor().submit(normalize_image, data).result())[1] for _ in range(ROUNDS)]
+
+    before, after = b64_size(data), b64_size(normalized)
+    print(f"{name}")
+    print(f"  payload   {before / 1024:9.1f} KiB -> {after / 1024:8.1f} KiB ({content_type}), "
+          f"{100 * (1 - after / before):.1f}% smaller")
+    print(f"  inline    median {sorted(inline)[ROUNDS // 2]:7.1f} ms")
+    print(f"  pool      median {sorted(pool)[ROUNDS // 2]:7.1f} ms")
+
+
+if __name__ == '__main__':
+    paths = sys.argv[1:]
+    if paths:
+        for path in paths:
+            with open(path, 'rb') as f:
+                report(path, f.read())
+    else:
+        report('synthetic 4032x3024 JPEG', synthetic_photo())
@@ -0,0 +1,181 @@
+"""Serialization cost of the /candidates, /chairmen and /polling-units payloads.
+
+    python benchmarks/json_serialization.py [--limit 200] [--chairmen 170] [--units 500] [--rounds 20]
+
+Builds documents shaped like the routes' output: candidates_pipeline pages
+of candidate_form documents from benchmarks/synthetic_data.py (summaries, and
+complete forms as with ?full=true), the /chairmen lookup of chairmen with
+their deputies, and polling_units_pipeline pages of the units in
+data/polling_units.json with their counts and officer. Dates are naive and
+millisecond precise, as pymongo returns them. The old encoding path of each
+route (app.json's stdlib json with sort_keys and json_util's canonical
+fallback; json_util.dumps for /chairmen) is timed against
+encoder.dumps_bytes, reporting milliseconds per payload and the encoded size.
+No database is needed.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId, json_util
+
+import encoder
+from synthetic_data import (ELECTION_OPENS, FIRST_NAMES, LAST_NAMES, candidate_form, load_polling_units,
+                            object_id)
+
+# routes_authentication.CANDIDATE_SUMMARY_FIELDS, plus the _id every
+# projection keeps
+SUMMARY_FIELDS = ['_id', 'firstName', 'lastName', 'surname', 'otherNames', 'localGovernment', 'ward',
+                  'position', 'status', 'in_review', 'createdAt', 'deputy']
+
+
+def old_dumps(obj):
+    # what app.json (encoder.MongoJsonEncoder) did before
+    def default(value):
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%dT%H:%M:%S")
+        if isinstance(value, ObjectId):
+            return str(value)
+        return json_util.default(value, json_util.CANONICAL_JSON_OPTIONS)
+    return json.dumps(obj, default=default, sort_keys=True, ensure_ascii=False).encode('utf-8')
+
+
+def old_chairmen_dumps(obj):
+    # /chairmen returned json_util.dumps: {"$oid": ...} and {"$date": ...}
+    return json_util.dumps(obj).encode('utf-8')
+
+
+def stored(moment):
+    # a datetime as pymongo reads it back: naive UTC, milliseconds
+    moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.replace(microsecond=moment.microsecond // 1000 * 1000)
+
+
+def candidate(rng, n, lga, ward, position):
+    created_at = ELECTION_OPENS - timedelta(days=90, minutes=rng.randint(0, 60 * 24 * 60),
+                                            microseconds=rng.randint(0, 999999))
+    form = candidate_form(rng, lga, ward, position, stored(created_at))
+    form['_id'] = object_id(created_at, n)
+    return form
+
+
+def summary(form):
+    return {field: form[field] for field in SUMMARY_FIELDS if field in form}
+
+
+def candidate_lists(rng, count, lgas, wards):
+    chairmen, deputies, councillors = [], [], []
+    for n in range(1, count + 1):
+        lga = lgas[n % len(lgas)]
+        deputy = candidate(rng, n, lga, None, 'Deputy Chairman')
+        chairman = candidate(rng, n, lga, None, 'Chairman')
+        chairman['deputy'] = deputy['_id']
+        chairmen.append(chairman)
+        deputies.append(deputy)
+        lga, ward = wards[n % len(wards)]
+        councillors.append(candidate(rng, n, lga, ward, 'Councillor'))
+    return chairmen, deputies, councillors
+
+
+def candidates_payload(chairmen, deputies, councillors, full):
+    # get_candidates over candidates_pipeline: chairmen carry their deputy
+    # through the $lookup, summarised unless ?full=true
+    shape = dict if full else summary
+    deputy_by_id = {deputy['_id']: shape(deputy) for deputy in deputies}
+    statuses = [form['status'] for form in chairmen + deputies + councillors]
+    return {
+        'totalSubmissions': len(statuses),
+        'submissionsApproved': statuses.count('approved'),
+        'submissionsDeclined': statuses.count('rejected'),
+        'submissionsInReview': statuses.count('submitted'),
+        'page': 1,
+        'limit': len(chairmen),
+        'candidates': {
+            'chairmen': [dict(shape(chairman), deputy=deputy_by_id[chairman['deputy']]) for chairman in chairmen],
+            'deputyChairmen': [shape(deputy) for deputy in deputies],
+            'councillors': [shape(councillor) for councillor in councillors]
+        }
+    }
+
+
+def chairmen_payload(chairmen, deputies):
+    # get_chairmen: every chairman with the complete deputy form $unwind-ed in
+    deputy_by_id = {deputy['_id']: deputy for deputy in deputies}
+    return {'chairmen': [dict(chairman, deputy=deputy_by_id[chairman['deputy']]) for chairman in chairmen]}
+
+
+def polling_units_payload(rng, units):
+    # get_polling_units over polling_units_pipeline
+    page = []
+    for n, unit in enumerate(units, 1):
+        created_at = stored(ELECTION_OPENS - timedelta(days=30))
+        officer = {
+            '_id': object_id(ELECTION_OPENS - timedelta(days=30), n),
+            'firstName': rng.choice(FIRST_NAMES).title(),
+            'lastName': rng.choice(LAST_NAMES).title(),
+            'email': f"officer{n}@bench.plateau.test",
+            'username': f"officer{n}",
+            'createdAt': created_at,
+            'role': 'PO',
+            'polling_unit': unit['name'],
+            'ward': unit['ward'],
+            'lga': unit['lga']
+        }
+        page.append(dict(unit, _id=object_id(ELECTION_OPENS - timedelta(days=60), n),
+                         accredited=rng.randint(0, 600), rejected=rng.randint(0, 30), pollingUnitOfficer=officer))
+    accredited = sum(unit['accredited'] for unit in page)
+    manual = sum(rng.randint(0, unit['accredited']) for unit in page)
+    return {
+        'pollingUnits': page,
+        'page': 1,
+        'limit': len(page),
+        'total': 3840,
+        'totalAccredited': accredited,
+        'totalRejected': sum(unit['rejected'] for unit in page),
+        'totalManual': manual,
+        'totalAuto': accredited - manual
+    }
+
+
+def timed(dumps, payload, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        body = dumps(payload)
+    return (time.perf_counter() - start) / rounds * 1000, len(body)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=200, help='candidates per list, as /candidates?limit=')
+    parser.add_argument('--chairmen', type=int, default=170, help='chairmen returned by /chairmen')
+    parser.add_argument('--units', type=int, default=500, help='polling units per page, as /polling-units?limit=')
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    units = load_polling_units()
+    lgas = sorted({unit['lga'] for unit in units if unit['lga']})
+    wards = sorted({(unit['lga'], unit['ward']) for unit in units if unit['lga']})
+    page = candidate_lists(rng, args.limit, lgas, wards)
+    chairmen, deputies, _ = candidate_lists(rng, args.chairmen, lgas, wards)
+    payloads = [
+        ('/candidates', old_dumps, candidates_payload(*page, full=False)),
+        ('/candidates?full', old_dumps, candidates_payload(*page, full=True)),
+        ('/chairmen', old_chairmen_dumps, chairmen_payload(chairmen, deputies)),
+        ('/polling-units', old_dumps, polling_units_payload(rng, units[:args.units])),
+    ]
+    backend = 'orjson' if encoder.orjson is not None else 'stdlib json'
+    print(f"encoder backend: {backend}, {args.rounds} rounds per payload")
+    print(f"{'payload':<17} {'old ms':>8} {'new ms':>8} {'speedup':>8} {'old KiB':>8} {'new KiB':>8}")
+    for name, old, payload in payloads:
+        old_ms, old_size = timed(old, payload, args.rounds)
+        new_ms, new_size = timed(encoder.dumps_bytes, payload, args.rounds)
+        print(f"{name:<17} {old_ms:>8.1f} {new_ms:>8.1f} {old_ms / new_ms:>7.1f}x "
+              f"{old_size / 1024:>8.1f} {new_size / 1024:>8.1f}")
@@ -0,0 +1,67 @@
+"""Login-storm throughput of the bcrypt pool at different worker counts.
+
+    python benchmarks/login_storm.py [--logins 400] [--clients 64] [--workers 1,2,4,8]
+
+Simulates `--clients` request threads each verifying passwords through
+password_hashing's BoundedExecutor, as /login does, and reports verified
+logins per second, rejected (503) logins, and the average and worst queue
+wait versus hash time for each pool size. No database is needed.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+
+from workers import BoundedExecutor, Overloaded
+
+PASSWORD = 'Pl4teau24'
+
+
+def storm(workers, logins, clients, max_queue, hashed):
+    executor = BoundedExecutor(workers, max_queue, name=f'bench-{workers}')
+    remaining = iter(range(logins))
+    lock = threading.Lock()
+    rejected = [0]
+
+    def client():
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            try:
+                executor.run(bcrypt.checkpw, PASSWORD.encode(), hashed)
+            except Overloaded:
+                with lock:
+                    rejected[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return executor.stats(), rejected[0], elapsed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=400)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--max-queue', type=int, default=64)
+    parser.add_argument('--workers', default='1,2,4,8')
+    args = parser.parse_args()
+
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt())
+    print(f"{args.logins} logins from {args.clients} clients, queue limit {args.max_queue}, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'logins/s':>9} {'rejected':>8} {'avg wait':>9} {'max wait':>9} {'avg hash':>9} {'max hash':>9}")
+    for workers in (int(w) for w in args.workers.split(',')):
+        stats, rejected, elapsed = storm(workers, args.logins, args.clients, args.max_queue, hashed)
+        print(f"{workers:>7} {stats['completed'] / elapsed:>9.1f} {rejected:>8} "
+              f"{stats['avgWaitSeconds'] * 1000:>7.0f}ms {stats['maxWaitSeconds'] * 1000:>7.0f}ms "
+              f"{stats['avgRunSeconds'] * 1000:>7.0f}ms {stats['maxRunSeconds'] * 1000:>7.0f}ms")
@@ -0,0 +1,287 @@
+"""Deterministic election-scale dataset for benchmarks.
+
+    python benchmarks/synthetic_data.py [--out data/synthetic] [--voters 2800000] [--seed 2024] [--load]
+
+Writes one NDJSON file per collection, in Extended JSON where a record holds
+ObjectIds or dates, so `python seed.py <collection> <file>` loads it:
+
+    polling_units   all 3,840 units from data/polling_units.json, with the
+                    LGA filled in from the gazetteer where the ward resolves
+    voters          --voters voters spread unevenly over the units
+    users           a PO and an APO per unit, all with password BENCH_PASSWORD
+    accreditation   --accredited of the voters, completed or rejected,
+                    manual or auto, through election day
+    chairman, deputy_chairman, councillors
+                    complete candidate forms in every status
+
+The same --seed always produces the same files. --load imports them into
+DATABASE_NAME, which should be a scratch database, never the live one.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import ObjectId, json_util
+
+import gazetteer
+
+BENCH_PASSWORD = 'Pl4teau24'
+# bcrypt of BENCH_PASSWORD (cost 12), fixed so the output is reproducible
+BENCH_PASSWORD_HASH = '$2b$12$ULjWmiT6yAKPsfpIL6zb2.mB8he.4PjOUplvtiWMhIHRrs9W5c8J.'
+ELECTION_OPENS = datetime(2024, 10, 5, 7, 30, tzinfo=timezone.utc)
+ELECTION_HOURS = 6.5
+COLLECTIONS = ['polling_units', 'voters', 'users', 'accreditation', 'chairman', 'deputy_chairman', 'councillors']
+
+FIRST_NAMES = ['ABUBAKAR', 'AISHA', 'IBRAHIM', 'FATIMA', 'MUSA', 'ZAINAB', 'USMAN', 'HAUWA', 'DANLADI',
+               'GRACE', 'JOHN', 'MARY', 'PAM', 'CHOJI', 'NANMWA', 'DAVOU', 'GYANG', 'NENMAN', 'TOCHUKWU', 'BLESSING']
+LAST_NAMES = ['BELLO', 'SANI', 'ABDULLAHI', 'YUSUF', 'LAWAL', 'GARBA', 'DALYOP', 'BOT', 'GOYOL', 'MANCHA',
+              'LONGMAN', 'DAMAR', 'WUYEP', 'AUDU', 'IKEZE', 'OKORO', 'PWAJOK', 'JANG', 'LAR', 'DARIYE']
+PARTIES = ['APC', 'PDP', 'LP', 'NNPP', 'APGA', 'ADC', 'SDP', 'YPP', 'PRP', 'ZLP']
+OCCUPATIONS = ['Farmer', 'Teacher', 'Trader', 'Civil Servant', 'Engineer', 'Lawyer', 'Pharmacist', 'Businessman']
+
+
+# candidate ids count from a different base in each collection, so a chairman
+# and the deputy created with it never share an _id
+CANDIDATE_ID_BASE = {'chairman': 1 << 40, 'deputy_chairman': 2 << 40, 'councillors': 3 << 40}
+
+
+def object_id(moment, n):
+    # time-ordered like a server-generated id, but reproducible
+    return ObjectId(struct.pack('>IQ', int(moment.timestamp()), n))
+
+
+def digest(kind, n):
+    return hashlib.sha256(f"{kind}-{n}".encode()).hexdigest()
+
+
+def vin(n):
+    # a bijection on 17 digits, so VINs are unique but not sequential
+    return f"INC{(n * 829812971 + 4108800133) % 10 ** 17:017d}"
+
+
+def election_moment(rng):
+    return ELECTION_OPENS + timedelta(seconds=rng.uniform(0, ELECTION_HOURS * 3600))
+
+
+def birth_date(rng, youngest=18, oldest=75):
+    return (datetime(2024, 10, 5) - timedelta(days=rng.randint(youngest * 365, oldest * 365))).strftime('%Y-%m-%d')
+
+
+def load_polling_units():
+    with open(gazetteer.POLLING_UNITS_FILE) as f:
+        units = json.load(f)
+    for unit in units:
+        unit['lga'] = gazetteer.lga_for_ward(unit.get('ward'))
+    return units
+
+
+def candidate_form(rng, lga, ward, position, created_at):
+    first, last = rng.choice(FIRST_NAMES).title(), rng.choice(LAST_NAMES).title()
+    status = rng.choices(['submitted', 'approved', 'rejected'], weights=[5, 3, 2])[0]
+    address = f"{rng.randint(1, 200)} Rayfield Road, {lga}"
+    return {
+        'firstName': first,
+        'lastName': last,
+        'surname': last,
+        'otherNames': rng.choice(FIRST_NAMES).title(),
+        'address': address,
+        'residentialAddress': address,
+        'postalAddress': f"P.O. Box {rng.randint(100, 9999)}, Jos",
+        'occupation': rng.choice(OCCUPATIONS),
+        'localGovernment': lga,
+        'ward': ward,
+        'maritalStatus': rng.choice(['Single', 'Married']),
+        'nationality': 'Nigerian',
+        'birthPlace': lga,
+        'birthDate': birth_date(rng, 30, 70),
+        'state': 'Plateau',
+        'indigeneOfPresentPlace': rng.random() < 0.8,
+        'presentPlaceStayDuration': f"{rng.randint(5, 40)} years",
+        'criminalOffenseTrial': {'tried': False, 'optionConclusion': ''},
+        'conductTribunalTrial': {'tried': False, 'optionConclusion': ''},
+        'lunacyInquiryTrial': {'tried': False, 'optionConclusion': ''},
+        'bankruptcyEnquiry': {'bankruptcyInvolvment': False, 'optionConclusion': ''},
+        'arrestHistory': {'arrested': False, 'optionConclusion': ''},
+        'politicalPartyData': {'isPartyMember': True, 'optionConclusion': rng.choice(PARTIES)},
+        'partySponsorData': {'partyIsSponsoring': True, 'optionConclusion': ''},
+        'taxHistoryData': {'threeYearsCompletion': True, 'optionConclusion': ''},
+        'drugHistoryData': {'beenOnDrugs': False, 'optionConclusion': ''},
+        'voteData': {'isRegisteredVoter': True, 'optionConclusion': ''},
+        'institutionData': [{
+            'institutionName': 'University of Jos',
+            'institutionType': 'University',
+            'institutionStartDate': '1995-10-01',
+            'institutionEndDate': '1999-07-31'
+        }],
+        'educationQualificationData': [{
+            'experience': 'Degree', 'qualification': 'B.Sc', 'institutionName': 'University of Jos', 'obtainDate': '1999-07-31'
+        }],
+        'workExperienceData': [{
+            'qualification': 'B.Sc', 'companyName': 'Plateau State Civil Service',
+            'startDate': '2001-01-15', 'endDate': '2020-12-31', 'tillPresent': False
+        }],
+        'politicalExperienceData': [{'experience': 'Ward Secretary'}],
+        'contestingReason': 'To serve the people of my community.',
+        'sponsor': rng.choice(PARTIES),
+        'oath': 'I solemnly swear that the information given is true.',
+        'nominators': [{
+            'firstName': rng.choice(FIRST_NAMES).title(),
+            'lastName': rng.choice(LAST_NAMES).title(),
+            'address': address,
+            'occupation': rng.choice(OCCUPATIONS),
+            'localGovernment': lga,
+            'ward': ward,
+            'signature': digest('signature', rng.getrandbits(32))
+        } for _ in range(10)],
+        'documents': {name: f"https://storage.example/{digest(name, rng.getrandbits(32))}.pdf" for name in (
+            'curriculumVitae', 'nationalIdentificationSlip', 'birthCertificate', 'partyMembershipCard',
+            'voterCard', 'taxClearance'
+        )},
+        'status': status,
+        'position': position,
+        'in_review': status == 'submitted',
+        'createdAt': created_at
+    }
+
+
+class Writers:
+    def __init__(self, out):
+        os.makedirs(out, exist_ok=True)
+        self.files = {name: open(os.path.join(out, f"{name}.ndjson"), 'w') for name in COLLECTIONS}
+        self.counts = dict.fromkeys(COLLECTIONS, 0)
+
+    def write(self, name, record, extended=False):
+        line = json_util.dumps(record, json_options=json_util.RELAXED_JSON_OPTIONS) if extended else json.dumps(record)
+        self.files[name].write(line + '\n')
+        self.counts[name] += 1
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def generate(out, voter_total, accredited, chairmen, councillors, seed):
+    rng = random.Random(seed)
+    writers = Writers(out)
+    units = load_polling_units()
+
+    for unit in units:
+        writers.write('polling_units', unit)
+
+    # real units differ a lot in size
+    weights = [rng.uniform(0.3, 1.7) for _ in units]
+    scale = voter_total / sum(weights)
+    voter_n = accreditation_n = user_n = 0
+    for index, unit in enumerate(units):
+        location = {'polling_unit': unit['name'], 'ward': unit['ward'], 'lga': unit['lga']}
+        for role in ('PO', 'APO'):
+            user_n += 1
+            writers.write('users', {
+                'firstName': rng.choice(FIRST_NAMES).title(),
+                'lastName': rng.choice(LAST_NAMES).title(),
+                'email': f"officer{user_n}@bench.plateau.test",
+                'username': f"officer{user_n}",
+                'password': BENCH_PASSWORD_HASH,
+                'createdAt': ELECTION_OPENS - timedelta(days=30),
+                'role': role,
+                **location
+            }, extended=True)
+
+        count = voter_total - voter_n if index == len(units) - 1 else round(weights[index] * scale)
+        for _ in range(max(count, 0)):
+            voter_n += 1
+            voter_vin = vin(voter_n)
+            initial = rng.choice(FIRST_NAMES)[0]
+            writers.write('voters', {
+                'success': True,
+                'VIN': voter_vin,
+                'DOB': birth_date(rng)[:4],
+                'full_name': f"{rng.choice(LAST_NAMES)}, {rng.choice(FIRST_NAMES)} {initial}.",
+                **location
+            })
+            if rng.random() >= accredited:
+                continue
+            accreditation_n += 1
+            moment = election_moment(rng)
+            accreditation_type = rng.choices(['auto', 'manual'], weights=[3, 2])[0]
+            record = {
+                '_id': object_id(moment, accreditation_n),
+                'status': rng.choices(['completed', 'rejected'], weights=[19, 1])[0],
+                'type': accreditation_type,
+                'polling_unit': unit['name'],
+                'voterDetails': {
+                    'vin': voter_vin,
+                    'voterCardImageId': digest('card', accreditation_n),
+                    'faceCaptureImageId': digest('face', accreditation_n),
+                    'accreditedAt': moment
+                },
+                'updatedAt': moment
+            }
+            if accreditation_type == 'auto':
+                record['sessionId'] = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+            writers.write('accreditation', record, extended=True)
+
+    lgas = sorted({unit['lga'] for unit in units if unit['lga']})
+    wards = sorted({(unit['lga'], unit['ward']) for unit in units if unit['lga']})
+    for n in range(1, chairmen + 1):
+        lga = lgas[n % len(lgas)]
+        created_at = ELECTION_OPENS - timedelta(days=90, minutes=rng.randint(0, 60 * 24 * 60))
+        deputy = candidate_form(rng, lga, None, 'Deputy Chairman', created_at)
+        deputy['_id'] = object_id(created_at, CANDIDATE_ID_BASE['deputy_chairman'] + n)
+        chairman = candidate_form(rng, lga, None, 'Chairman', created_at)
+        chairman['_id'] = object_id(created_at, CANDIDATE_ID_BASE['chairman'] + n)
+        chairman['deputy'] = deputy['_id']
+        writers.write('deputy_chairman', deputy, extended=True)
+        writers.write('chairman', chairman, extended=True)
+    for n in range(1, councillors + 1):
+        lga, ward = wards[n % len(wards)]
+        created_at = ELECTION_OPENS - timedelta(days=90, minutes=rng.randint(0, 60 * 24 * 60))
+        councillor = candidate_form(rng, lga, ward, 'Councillor', created_at)
+        councillor['_id'] = object_id(created_at, CANDIDATE_ID_BASE['councillors'] + n)
+        writers.write('councillors', councillor, extended=True)
+
+    writers.close()
+    return writers.counts
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--out', default='data/synthetic')
+    parser.add_argument('--voters', type=int, default=2800000)
+    parser.add_argument('--accredited', type=float, default=0.35, help='fraction of voters with an accreditation record')
+    parser.add_argument('--chairmen', type=int, default=170)
+    parser.add_argument('--councillors', type=int, default=3000)
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--load', action='store_true', help='import the files into DATABASE_NAME with seed.py')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generate(args.out, args.voters, args.accredited, args.chairmen, args.councillors, args.seed)
+    print(f"Wrote {args.out} in {time.perf_counter() - start:.0f}s:")
+    for name, count in counts.items():
+        print(f"  {name}: {count}")
+
+    if args.load:
+        import seed
+        from config import db
+        from indexes import ensure_indexes
+
+        print(f"Loading into database {db.name}")
+        ensure_indexes()
+        seed.make_keys_unique()
+        for name in COLLECTIONS:
+            totals = seed.import_dataset(name, os.path.join(args.out, f"{name}.ndjson"), batch_size=2000)
+            print(f"  {name}: {totals['rows']} rows, {totals['rows'] / max(totals['seconds'], 1e-9):.0f} rows/s")
+            # voters, users and accreditation records name every unit
+            if name == 'polling_units' and db.polling_units.count_documents({}) != counts[name]:
+                sys.exit(f"polling_units: wrote {counts[name]} units but {db.name} holds "
+                         f"{db.polling_units.count_documents({})}")
@@ -0,0 +1,169 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+
+# Content-addressed storage for accreditation images. A blob is stored once
+# under the sha256 of its bytes; documents keep only that digest.
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+DATA_URL_PATTERN = re.compile(r'^data:([\w/+.-]+)?(;base64)?,', re.IGNORECASE)
+
+MAGIC_NUMBERS = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF8', 'image/gif'),
+]
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def sniff_content_type(head):
+    for magic, content_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+def decode_image(value):
+    """Bytes of a base64 image, given either a data URL or bare base64."""
+    if not isinstance(value, str) or not value:
+        raise InvalidImage('Image must be a base64 string')
+    value = DATA_URL_PATTERN.sub('', value.strip(), count=1)
+    try:
+        return base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise InvalidImage('Image is not valid base64')
+
+
+def is_digest(value):
+    return isinstance(value, str) and bool(DIGEST_PATTERN.match(value))
+
+
+class LocalBlobStore:
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def put(self, data):
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # write then rename, so readers never see a partial blob
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return digest
+
+    def open(self, digest):
+        """Return (file object, content type); raises KeyError if missing."""
+        if not is_digest(digest) or not os.path.exists(self._path(digest)):
+            raise KeyError(digest)
+        f = open(self._path(digest), 'rb')
+        content_type = sniff_content_type(f.read(12))
+        f.seek(0)
+        return f, content_type
+
+
+class GridFSBlobStore:
+    def __init__(self, db, bucket_name='images'):
+        import gridfs
+
+        self.files = db[f'{bucket_name}.files']
+        self.bucket = gridfs.GridFSBucket(db, bucket_name=bucket_name)
+
+    def put(self, data):
+        from pymongo.errors import DuplicateKeyError
+
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.files.find_one({'_id': digest}, {'_id': 1}):
+            try:
+                self.bucket.upload_from_stream_with_id(
+                    digest, digest, data,
+                    metadata={'contentType': sniff_content_type(data[:12])}
+                )
+            except DuplicateKeyError:
+                # the same image was stored concurrently
+                pass
+        return digest
+
+    def open(self, digest):
+        import gridfs
+
+        if not is_digest(digest):
+            raise KeyError(digest)
+        try:
+            grid_out = self.bucket.open_download_stream(digest)
+        except gridfs.errors.NoFile:
+            raise KeyError(digest)
+        return grid_out, (grid_out.metadata or {}).get('contentType', 'application/octet-stream')
+
+
+def create_blob_store():
+    """Blob store selected by BLOB_STORE ('local' or 'gridfs')."""
+    backend = os.getenv('BLOB_STORE', 'local')
+    if backend == 'gridfs':
+        from config import db
+        return GridFSBlobStore(db)
+    if backend == 'local':
+        return LocalBlobStore(os.getenv('BLOB_STORE_PATH', 'uploads/blobs'))
+    raise ValueError(f'Unknown BLOB_STORE backend: {backend}')
+
+
+# Helper function to store a base64 image and return its digest
+def store_image(blob_store, value):
+    return blob_store.put(decode_image(value))
+
+
+# Helper function to read a stored image back as a base64 data URL
+def load_image(blob_store, digest):
+    f, content_type = blob_store.open(digest)
+    with f:
+        data = f.read()
+    return f"data:{content_type};base64,{base64.b64encode(data).decode('utf-8')}"
+
+
+def migrate_inline_images(db, blob_store):
+    """Move base64 images embedded in accreditation documents into the blob
+    store and replace them with digests. Images that fail to decode are left
+    in place and counted."""
+    fields = ['voterCardImage', 'faceCaptureImage']
+    paths = fields + [f'voterDetails.{field}' for field in fields]
+    migrated, failed = 0, 0
+
+    cursor = db.accreditation.find({'$or': [{path: {'$exists': True}} for path in paths]}, paths)
+    for record in cursor:
+        update = {'$set': {}, '$unset': {}}
+        for path in paths:
+            parent, _, field = path.rpartition('.')
+            container = record.get(parent, {}) if parent else record
+            if field not in container:
+                continue
+            try:
+                digest = store_image(blob_store, container[field])
+            except InvalidImage:
+                failed += 1
+                continue
+            update['$set'][f'{path}Id'] = digest
+            update['$unset'][path] = ''
+        if update['$set']:
+            db.accreditation.update_one({'_id': record['_id']}, update)
+            migrated += 1
+    return migrated, failed
+
+
+if __name__ == '__main__':
+    from config import db
+
+    migrated, failed = migrate_inline_images(db, create_blob_store())
+    print(f"Moved images out of {migrated} accreditation records, {failed} images could not be decoded")
@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire `ttl` seconds after they
+    are set."""
+
+    def __init__(self, maxsize=1024, ttl=3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[0]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key: the first caller runs the
+    function, the others wait for and share its result (or exception)."""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return (result, shared), where shared is True for waiters."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def __len__(self):
+        return len(self._calls)
+
+
+class MongoCacheStore:
+    """Cache tier in a Mongo collection that survives restarts. Entries carry
+    a `createdAt` stamp; a TTL index on it (see indexes.py) removes them, and
+    reads ignore entries the TTL monitor has not reached yet."""
+
+    def __init__(self, collection, ttl):
+        self.collection = collection
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl)
+        doc = self.collection.find_one({'_id': key, 'createdAt': {'$gt': cutoff}})
+        return default if doc is None else doc['value']
+
+    def set(self, key, value):
+        self.collection.update_one(
+            {'_id': key},
+            {'$set': {'value': value, 'createdAt': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+
+class TieredCache:
+    """In-process TTLCache in front of an optional persistent store, with
+    single-flight coalescing of misses and hit/miss counters."""
+
+    def __init__(self, memory, store=None):
+        self.memory = memory
+        self.store = store
+        self.single_flight = SingleFlight()
+        self._counters = {'memoryHits': 0, 'storeHits': 0, 'misses': 0, 'coalesced': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get_or_compute(self, key, fn):
+        value = self.memory.get(key)
+        if value is not None:
+            self._count('memoryHits')
+            return value
+
+        def load():
+            if self.store is not None:
+                stored = self.store.get(key)
+                if stored is not None:
+                    self._count('storeHits')
+                    self.memory.set(key, stored)
+                    return stored
+            self._count('misses')
+            computed = fn()
+            if computed is not None:
+                self.memory.set(key, computed)
+                if self.store is not None:
+                    self.store.set(key, computed)
+            return computed
+
+        value, shared = self.single_flight.do(key, load)
+        if shared:
+            self._count('coalesced')
+        return value
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['size'] = len(self.memory)
+        stats['inFlight'] = len(self.single_flight)
+        return stats
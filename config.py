@@ -6,6 +6,88 @@ from dotenv import load_dotenv
 load_dotenv()  # This loads environment variables from .env file
 
 client = MongoClient( os.environ.get('DATABASE_URI') )
-db = client['plateau']
+# benchmarks point this at a scratch database (see benchmarks/endpoints.py)
+db = client[os.environ.get('DATABASE_NAME', 'plateau')]
 
-SENDCHAMP_PUBLIC_KEY = os.environ.get('SENDCHAMP_PUBLIC_KEY')
\ No newline at end of file
+SENDCHAMP_PUBLIC_KEY = os.environ.get('SENDCHAMP_PUBLIC_KEY')
+
+# OCR results are cached by image content hash (see model.py)
+OCR_CACHE_TTL = int(os.environ.get('OCR_CACHE_TTL', 24 * 60 * 60))
+OCR_CACHE_SIZE = int(os.environ.get('OCR_CACHE_SIZE', 2048))
+OCR_CACHE_MONGO = os.environ.get('OCR_CACHE_MONGO', '').lower() in ('1', 'true', 'yes')
+
+# OCR job worker pool (see ocr_jobs.py)
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 4))
+OCR_QUEUE_SIZE = int(os.environ.get('OCR_QUEUE_SIZE', 100))
+
+# Abandoned in-progress auto accreditation sessions expire after this
+ACCREDITATION_SESSION_TTL = int(os.environ.get('ACCREDITATION_SESSION_TTL', 2 * 60 * 60))
+
+# Validated auth tokens are cached in process (see decorators.py)
+AUTH_CACHE_TTL = int(os.environ.get('AUTH_CACHE_TTL', 60))
+AUTH_CACHE_SIZE = int(os.environ.get('AUTH_CACHE_SIZE', 10000))
+
+# bcrypt work runs on a bounded pool (see password_hashing.py)
+HASH_WORKERS = int(os.environ.get('HASH_WORKERS', os.cpu_count() or 2))
+HASH_QUEUE_SIZE = int(os.environ.get('HASH_QUEUE_SIZE', 64))
+HASH_TIMEOUT = float(os.environ.get('HASH_TIMEOUT', 10))
+
+# Seconds between checks for re-imported reference data (see reference_data.py)
+REFERENCE_DATA_CHECK_INTERVAL = int(os.environ.get('REFERENCE_DATA_CHECK_INTERVAL', 30))
+
+# Fernet key for voter data sent to devices
+ENCRYPTION_KEY_VOTER_DATA = os.environ.get('ENCRYPTION_KEY_VOTER_DATA')
+
+# Where prebuilt offline voter-register bundles are written (see voter_bundles.py)
+VOTER_BUNDLE_PATH = os.environ.get('VOTER_BUNDLE_PATH', 'bundles')
+
+# Plaintext size of each encrypted /voters_data frame
+VOTER_CHUNK_BYTES = int(os.environ.get('VOTER_CHUNK_BYTES', 64 * 1024))
+
+# Source of live accreditation counter deltas (see live_counters.py):
+# 'change_stream' (needs a replica set) or 'local', which only sees this
+# process's writes and so is only correct with a single worker. Must be set.
+ACCREDITATION_EVENTS = os.environ.get('ACCREDITATION_EVENTS')
+
+# Images are normalized before OCR (see image_preprocessing.py)
+IMAGE_MAX_EDGE = int(os.environ.get('IMAGE_MAX_EDGE', 1600))
+IMAGE_FORMAT = os.environ.get('IMAGE_FORMAT', 'JPEG').upper()
+IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 85))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+# Election Q&A: sections of LLM_election_info.txt sent per question, and the
+# answer cache keyed on the normalized question (see election_info.py)
+ELECTION_INFO_TOP_K = int(os.environ.get('ELECTION_INFO_TOP_K', 3))
+ANSWER_CACHE_TTL = int(os.environ.get('ANSWER_CACHE_TTL', 60 * 60))
+ANSWER_CACHE_SIZE = int(os.environ.get('ANSWER_CACHE_SIZE', 1024))
+
+# WhatsApp replies are generated on a bounded pool (see whatsapp_replies.py);
+# retried deliveries of a MessageSid seen within the dedupe TTL are ignored
+WHATSAPP_WORKERS = int(os.environ.get('WHATSAPP_WORKERS', 4))
+WHATSAPP_QUEUE_SIZE = int(os.environ.get('WHATSAPP_QUEUE_SIZE', 200))
+WHATSAPP_DEDUPE_TTL = int(os.environ.get('WHATSAPP_DEDUPE_TTL', 24 * 60 * 60))
+# 'mongo' shares seen SIDs across processes; 'memory' is per process
+WHATSAPP_DEDUPE = os.environ.get('WHATSAPP_DEDUPE', 'mongo')
+# Public URL Twilio posts to, for signature validation behind a proxy;
+# defaults to the request URL
+WHATSAPP_WEBHOOK_URL = os.environ.get('WHATSAPP_WEBHOOK_URL')
+
+# In-process LRU in front of the translation memory in db.translations
+# (see translation_memory.py)
+TRANSLATION_CACHE_SIZE = int(os.environ.get('TRANSLATION_CACHE_SIZE', 10000))
+TRANSLATION_CACHE_TTL = int(os.environ.get('TRANSLATION_CACHE_TTL', 24 * 60 * 60))
+# When a batch reply cannot be matched up, at most TRANSLATION_FALLBACK_LIMIT
+# of its strings are retried one by one, TRANSLATION_FALLBACK_WORKERS at a time
+TRANSLATION_FALLBACK_WORKERS = int(os.environ.get('TRANSLATION_FALLBACK_WORKERS', 4))
+TRANSLATION_FALLBACK_LIMIT = int(os.environ.get('TRANSLATION_FALLBACK_LIMIT', 20))
+
+# Every model call goes through llm_gateway.py: a per-process concurrency cap,
+# a deadline per call, retries with jittered backoff, and a circuit breaker
+LLM_MODEL = os.environ.get('LLM_MODEL', 'gpt-4o-mini')
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 8))
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 30))
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 3))
+LLM_BACKOFF_BASE = float(os.environ.get('LLM_BACKOFF_BASE', 0.5))
+LLM_BACKOFF_MAX = float(os.environ.get('LLM_BACKOFF_MAX', 8))
+LLM_BREAKER_THRESHOLD = int(os.environ.get('LLM_BREAKER_THRESHOLD', 5))
+LLM_BREAKER_RESET = float(os.environ.get('LLM_BREAKER_RESET', 30))
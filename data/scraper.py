@@ -1,5 +1,11 @@
 import json
+import os
 import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from json_stream import iter_records
 
 test_units = [
     {"polling_unit": "SHILUR_MARKET",
@@ -14,14 +20,14 @@ test_units = [
   "ward": "DU",
   "lga": "JOS_SOUTH"}]
 
-new_voters = []
-with open('data/voters.json') as f:
-    data = json.load(f)
-    for i in data:
+# Streams the register one voter at a time and writes NDJSON for
+# `python seed.py voters data/voters.ndjson`, instead of rewriting voters.json
+# in memory
+source = sys.argv[1] if len(sys.argv) > 1 else 'data/voters.json'
+target = sys.argv[2] if len(sys.argv) > 2 else 'data/voters.ndjson'
+
+with open(target, 'w') as f:
+    for i in iter_records(source):
         random_polling_unit = random.choice(test_units)
         new_data = {**i, **random_polling_unit}
-        new_voters.append(new_data)
-
-
-with open('data/voters.json', 'w') as f:
-    json.dump(new_voters, f)
\ No newline at end of file
+        f.write(json.dumps(new_data) + '\n')
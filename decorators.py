@@ -1,10 +1,13 @@
+from datetime import datetime, timezone
 from functools import wraps
 
 from flask import jsonify, request
 from marshmallow import ValidationError
-from config import db
+from cache import TTLCache
+from config import AUTH_CACHE_SIZE, AUTH_CACHE_TTL, db
 
 auth_collection = db.auth
+auth_cache = TTLCache(maxsize=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
 
 def validate_schema(schema):
     def decorator(f):
@@ -24,23 +27,65 @@ def validate_schema(schema):
     return decorator
 
 
+# Helper function to read a bounded integer query parameter
+def get_int_arg(name, default, minimum=1, maximum=None):
+    try:
+        value = int(request.args.get(name, default))
+    except (TypeError, ValueError):
+        value = default
+    value = max(value, minimum)
+    if maximum is not None:
+        value = min(value, maximum)
+    return value
+
+
+# Helper function to read the token from "Authorization: <token>" or
+# "Authorization: Bearer <token>"
+def get_request_token():
+    auth_header = request.headers.get('Authorization', '').strip()
+    if auth_header.lower().startswith('bearer '):
+        auth_header = auth_header[7:].strip()
+    return auth_header or None
+
+
+def as_utc(value):
+    # pymongo returns naive datetimes unless the client is tz_aware
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def verify_token(token):
+    """Active, unexpired auth record for a token, or None. Valid records are
+    cached until they expire, for at most AUTH_CACHE_TTL seconds, which also
+    bounds how long a logout in another process takes to apply here."""
+    now = datetime.now(timezone.utc)
+    auth_record = auth_cache.get(token)
+    if auth_record is not None and as_utc(auth_record['expiry']) > now:
+        return auth_record
+
+    auth_record = auth_collection.find_one({'token': token, 'is_active': True, 'expiry': {'$gt': now}})
+    if not auth_record:
+        return None
+    ttl = min(AUTH_CACHE_TTL, (as_utc(auth_record['expiry']) - now).total_seconds())
+    auth_cache.set(token, auth_record, ttl=ttl)
+    return auth_record
+
+
+def invalidate_token(token):
+    if token:
+        auth_cache.pop(token)
+
+
 def login_required(f):
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            if 'Authorization' not in request.headers:
-                return jsonify({"message": "Unauthorized access"}), 401
-            
-            auth_header = request.headers.get('Authorization')
-            if not auth_header:
-                return jsonify({"message": "Unauthorized access"}), 401
-            
-            authorized_user = auth_collection.find_one({"token": auth_header})
-            if not authorized_user:
-                return jsonify({"message": "Unauthorized access"}), 401
-            # add the user to the request object
-            request.user = authorized_user
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
-        
\ No newline at end of file
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        token = get_request_token()
+        if not token:
+            return jsonify({"message": "Unauthorized access"}), 401
+
+        authorized_user = verify_token(token)
+        if not authorized_user:
+            return jsonify({"message": "Unauthorized access"}), 401
+        # add the user to the request object
+        request.user = authorized_user
+        return f(*args, **kwargs)
+    return decorated_function
@@ -0,0 +1,113 @@
+import math
+import re
+from collections import Counter
+
+# Lexical retrieval over LLM_election_info.txt. The document is split into
+# sections (each list item or FAQ carries its heading) and indexed with BM25
+# at startup, so a question is answered from its top-k sections instead of
+# the whole document.
+
+NO_ANSWER = "Sorry, I don't have an answer to that. I can only help with questions about the Plateau State Local Government Election."
+
+ITEM = re.compile(r'^(\d+\.|-)\s')
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+    a about all also am an and any are as at be been by can could do does for from had has have how i if in
+    is it its me my of on or our please should so that the their then there these this to us was we were
+    what when where which who why will with would you your
+""".split())
+ARTICLES = frozenset(['a', 'an', 'the'])
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN.findall(str(text or '').lower()):
+        if len(token) < 2 or token in STOPWORDS:
+            continue
+        # plural folding: polls/poll, candidates/candidate
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def normalize_question(question):
+    """Cache key for a question: case, punctuation and articles dropped, so
+    "What time do polls open?" and "what time do the polls open" agree.
+    Question words are kept ("When/Where do polls open?" differ), which is
+    why this does not reuse the retrieval tokenizer."""
+    words = TOKEN.findall(str(question or '').lower())
+    return ' '.join(word for word in words if word not in ARTICLES)
+
+
+def split_sections(text):
+    sections, heading, current = [], None, []
+    after_blank = heading_used = False
+
+    def flush():
+        nonlocal heading_used
+        if current:
+            heading_used = heading is not None
+            body = ' '.join(line.strip() for line in current).replace('**', '')
+            sections.append(f"{heading}: {body}" if heading else body)
+            current.clear()
+
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            flush()
+        elif stripped.endswith(':') and not ITEM.match(line):
+            flush()
+            heading, heading_used = stripped.rstrip(':'), False
+        elif ITEM.match(line):
+            flush()
+            current.append(line)
+        else:
+            if after_blank and heading_used and not line[0].isspace():
+                # a plain paragraph after a list ends the heading's scope
+                heading = None
+            current.append(line)
+        after_blank = not stripped
+    flush()
+    return sections
+
+
+class SectionIndex:
+    def __init__(self, sections):
+        self.sections = sections
+        self.term_counts = [Counter(tokenize(section)) for section in sections]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        total = len(sections)
+        self.idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def score(self, terms, index):
+        counts, length = self.term_counts[index], self.lengths[index]
+        score = 0.0
+        for term in terms:
+            frequency = counts.get(term)
+            if frequency:
+                norm = K1 * (1 - B + B * length / self.average_length)
+                score += self.idf[term] * frequency * (K1 + 1) / (frequency + norm)
+        return score
+
+    def search(self, query, k=3):
+        """The k best matching sections in document order, or [] when no
+        section shares a term with the query."""
+        terms = set(tokenize(query))
+        scored = [(self.score(terms, index), index) for index in range(len(self.sections))]
+        best = sorted((item for item in scored if item[0] > 0), reverse=True)[:k]
+        return [self.sections[index] for _, index in sorted(best, key=lambda item: item[1])]
+
+
+def load_index(path):
+    with open(path, 'r') as f:
+        return SectionIndex(split_sections(f.read()))
@@ -1,11 +1,63 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from bson import Decimal128, ObjectId, json_util
 from flask.json.provider import DefaultJSONProvider
-from bson import json_util, ObjectId
-from datetime import datetime
-
-class MongoJsonEncoder(DefaultJSONProvider):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.strftime("%Y-%m-%dT%H:%M:%S")
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        return json_util.default(obj, json_util.CANONICAL_JSON_OPTIONS)
\ No newline at end of file
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+# One JSON encoding for every response. Mongo documents are serialized
+# natively: ObjectId as its hex string, datetimes as ISO 8601 without
+# microseconds (naive values, as pymongo returns them, carry no offset), and
+# Decimal128 / Decimal as strings so no precision is lost. Anything else BSON
+# can hold falls back to json_util's canonical extended JSON.
+
+
+def default(obj):
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, Decimal128):
+        return str(obj.to_decimal())
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        # matches orjson with OPT_OMIT_MICROSECONDS
+        return obj.replace(microsecond=0).isoformat() if isinstance(obj, datetime) else obj.isoformat()
+    return json_util.default(obj, json_util.CANONICAL_JSON_OPTIONS)
+
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_OMIT_MICROSECONDS | orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj):
+        return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+
+    def dumps(obj):
+        return dumps_bytes(obj).decode('utf-8')
+
+    loads = orjson.loads
+else:
+    def dumps(obj):
+        return json.dumps(obj, default=default, separators=(',', ':'), ensure_ascii=False)
+
+    def dumps_bytes(obj):
+        return dumps(obj).encode('utf-8')
+
+    loads = json.loads
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        # encode straight to bytes instead of str and back
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
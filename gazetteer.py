@@ -0,0 +1,152 @@
+import json
+import re
+import sys
+from collections import defaultdict
+from functools import lru_cache
+
+WARDS_FILE = 'data/wards.json'
+POLLING_UNITS_FILE = 'data/polling_units.json'
+
+QUOTES = re.compile(r"[‘’`´]")
+LGA_NOISE = re.compile(r"L\.?G\.?A\.?|CODE\s*-?\s*\d+")
+
+
+def normalize_name(value):
+    """Canonical form of a ward or polling unit name, for lookups only.
+
+    Upper-cases, unifies curly quotes, treats '_' and '.' as spacing and
+    collapses whitespace, so 'Zawan ‘B‘', "ZAWAN 'B'" and 'ZAWAN_B' agree
+    as far as the source spellings allow.
+    """
+    if not value:
+        return ''
+    value = QUOTES.sub("'", str(value).upper())
+    value = re.sub(r"[_.]", " ", value)
+    value = re.sub(r"\s*([/'])\s*", r"\1", value)
+    return " ".join(value.split())
+
+
+def normalize_lga(value):
+    """Canonical LGA name: drops the 'L.G.A' / 'CODE-03' suffixes and stray
+    dashes that appear in wards.json."""
+    if not value:
+        return ''
+    value = LGA_NOISE.sub(" ", QUOTES.sub("'", str(value).upper()))
+    return normalize_name(value.strip(" -–"))
+
+
+class Gazetteer:
+    """Hash indexes over the ward and polling unit reference files.
+
+    Every lookup is a dict access on normalized names; nothing here touches
+    the database.
+    """
+
+    def __init__(self, wards, polling_units):
+        self.lga_by_ward = {}
+        self.wards_by_lga = defaultdict(set)
+        self.polling_units_by_id = {}
+        self.polling_units_by_name = defaultdict(list)
+        self.polling_unit_wards_by_lga = defaultdict(set)
+
+        for ward in wards:
+            ward_name = normalize_name(ward.get('WARD NAME'))
+            lga = normalize_lga(ward.get('LGA NAME'))
+            if not ward_name or not lga:
+                continue
+            self.lga_by_ward.setdefault(ward_name, lga)
+            self.wards_by_lga[lga].add(ward_name)
+
+        for unit in polling_units:
+            self.polling_units_by_id[str(unit.get('id'))] = unit
+            self.polling_units_by_name[normalize_name(unit.get('name'))].append(unit)
+            lga = self.lga_for_ward(unit.get('ward'))
+            if lga:
+                # raw spellings, so they can be used directly in a Mongo $in
+                self.polling_unit_wards_by_lga[lga].add(unit.get('ward'))
+
+    def lga_for_ward(self, ward):
+        return self.lga_by_ward.get(normalize_name(ward))
+
+    def wards_in_lga(self, lga):
+        """Ward names in an LGA, as spelt in the polling unit data."""
+        return sorted(self.polling_unit_wards_by_lga.get(normalize_lga(lga), ()))
+
+    def resolve_polling_unit(self, name, ward=None):
+        """Resolve a polling unit name (and optionally its ward) to
+        {'polling_unit', 'ward', 'lga'}, or None if it is unknown or
+        ambiguous without the ward."""
+        candidates = self.polling_units_by_name.get(normalize_name(name), [])
+        if ward:
+            ward_name = normalize_name(ward)
+            candidates = [c for c in candidates if normalize_name(c.get('ward')) == ward_name]
+        if len(candidates) != 1:
+            return None
+        unit = candidates[0]
+        return {
+            'polling_unit': unit.get('name'),
+            'ward': unit.get('ward'),
+            'lga': self.lga_for_ward(unit.get('ward'))
+        }
+
+
+@lru_cache(maxsize=None)
+def get_gazetteer():
+    with open(WARDS_FILE) as f:
+        wards = json.load(f)
+    with open(POLLING_UNITS_FILE) as f:
+        polling_units = json.load(f)
+    return Gazetteer(wards, polling_units)
+
+
+def lga_for_ward(ward):
+    return get_gazetteer().lga_for_ward(ward)
+
+
+def wards_in_lga(lga):
+    return get_gazetteer().wards_in_lga(lga)
+
+
+def resolve_polling_unit(name, ward=None):
+    return get_gazetteer().resolve_polling_unit(name, ward)
+
+
+def enrich_polling_units(dry_run=False):
+    """Backfill the missing `lga` field on db.polling_units from the ward
+    index. Wards that cannot be resolved are reported, not guessed."""
+    from pymongo import UpdateOne
+    from config import db
+    import reference_data
+
+    gazetteer = get_gazetteer()
+    updates = []
+    unresolved = defaultdict(int)
+
+    missing = {'$or': [{'lga': {'$exists': False}}, {'lga': None}, {'lga': ''}]}
+    for unit in db.polling_units.find(missing, {'ward': 1}):
+        lga = gazetteer.lga_for_ward(unit.get('ward'))
+        if lga:
+            updates.append(UpdateOne({'_id': unit['_id']}, {'$set': {'lga': lga}}))
+        else:
+            unresolved[unit.get('ward')] += 1
+
+    updated = 0
+    if updates and not dry_run:
+        updated = db.polling_units.bulk_write(updates, ordered=False).modified_count
+    if updated:
+        reference_data.bump_version('polling_units')
+
+    return {
+        'resolved': len(updates),
+        'updated': updated,
+        'unresolvedWards': dict(unresolved)
+    }
+
+
+if __name__ == '__main__':
+    report = enrich_polling_units(dry_run='--dry-run' in sys.argv)
+    print(f"Resolved {report['resolved']} polling units, updated {report['updated']}")
+    if report['unresolvedWards']:
+        print(f"{len(report['unresolvedWards'])} wards missing from {WARDS_FILE}:")
+        for ward, count in sorted(report['unresolvedWards'].items(), key=lambda item: str(item[0])):
+            print(f"  {ward!r}: {count} polling units")
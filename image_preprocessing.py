@@ -0,0 +1,81 @@
+import base64
+import io
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from blob_store import InvalidImage, decode_image, sniff_content_type
+from config import IMAGE_FORMAT, IMAGE_MAX_EDGE, IMAGE_QUALITY, IMAGE_WORKERS
+
+# Phone cameras produce multi-megabyte images; the model reads a voter card
+# just as well from a downsized JPEG, which uploads and decodes much faster.
+# Preprocessing is an optimization: when the pool is slow or broken the
+# original image is sent. Unsupported or unreadable images raise InvalidImage.
+
+logger = logging.getLogger(__name__)
+
+# GIFs are flattened to their first frame
+ACCEPTED_FORMATS = {'JPEG', 'PNG', 'WEBP', 'MPO', 'GIF'}
+CONTENT_TYPES = {'JPEG': 'image/jpeg', 'WEBP': 'image/webp'}
+PREPROCESS_TIMEOUT = 30
+
+
+def normalize_image(data, max_edge=IMAGE_MAX_EDGE, image_format=IMAGE_FORMAT, quality=IMAGE_QUALITY):
+    """Return (bytes, content type) for `data` with EXIF orientation applied,
+    the longest edge capped at `max_edge` and re-encoded as JPEG or WEBP."""
+    try:
+        image = Image.open(io.BytesIO(data))
+    except UnidentifiedImageError:
+        raise InvalidImage('Unrecognised image format')
+    if image.format not in ACCEPTED_FORMATS:
+        raise InvalidImage(f'Unsupported image format: {image.format}')
+
+    try:
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS)
+    except (OSError, Image.DecompressionBombError) as e:
+        # truncated or corrupt data only fails once the pixels are read
+        raise InvalidImage(f'Unreadable image: {e}')
+
+    output = io.BytesIO()
+    image.save(output, format=image_format, quality=quality, optimize=True)
+    return output.getvalue(), CONTENT_TYPES[image_format]
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    # created on first use, so each gunicorn worker gets its own pool after fork
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+        return _executor
+
+
+def preprocess_for_ocr(base64_image):
+    """Normalize a base64 image or data URL in the process pool and return
+    it as a data URL ready for the model, or the original image as a data
+    URL when the pool times out or breaks. Raises InvalidImage for images
+    that are not an accepted format."""
+    global _executor
+    data = decode_image(base64_image)
+    try:
+        normalized, content_type = get_executor().submit(normalize_image, data).result(timeout=PREPROCESS_TIMEOUT)
+    except BrokenProcessPool:
+        logger.exception('Image preprocessing pool died, sending the original image')
+        with _executor_lock:
+            # the next call starts a fresh pool
+            _executor = None
+        normalized, content_type = data, sniff_content_type(data[:16])
+    except TimeoutError:
+        logger.warning('Image preprocessing took over %ss, sending the original image', PREPROCESS_TIMEOUT)
+        normalized, content_type = data, sniff_content_type(data[:16])
+    return f"data:{content_type};base64,{base64.b64encode(normalized).decode('utf-8')}"
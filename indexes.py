@@ -0,0 +1,104 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING, TEXT
+from pymongo.errors import OperationFailure
+
+from config import ACCREDITATION_SESSION_TTL, OCR_CACHE_TTL, WHATSAPP_DEDUPE_TTL, db
+
+# Indexes backing the query shapes used by the routes. create_index is a no-op
+# when the index already exists, so this is safe to run on every start, and
+# nothing built here can fail on existing data. An existing index on the same
+# keys with other options (e.g. made unique by seed.py) is left as it is. An
+# entry is a list of keys, or a (keys, options) tuple.
+
+logger = logging.getLogger(__name__)
+
+# Shared by the chairman, deputy_chairman and councillors collections: newest
+# first listing, the /candidates/search filters, and name search
+CANDIDATE_INDEXES = [
+    [('createdAt', DESCENDING), ('_id', DESCENDING)],
+    [('status', ASCENDING), ('createdAt', DESCENDING), ('_id', DESCENDING)],
+    [('localGovernment', ASCENDING), ('ward', ASCENDING), ('status', ASCENDING),
+     ('createdAt', DESCENDING), ('_id', DESCENDING)],
+    [('firstName', TEXT), ('lastName', TEXT), ('surname', TEXT), ('otherNames', TEXT)],
+]
+
+# create_index errors for an existing index on the same keys with other options
+INDEX_OPTIONS_CONFLICT = 85
+INDEX_KEY_SPECS_CONFLICT = 86
+
+INDEXES = {
+    'accreditation': [
+        [('polling_unit', ASCENDING), ('status', ASCENDING), ('_id', DESCENDING)],
+        [('status', ASCENDING), ('type', ASCENDING), ('_id', DESCENDING)],
+        ([('sessionId', ASCENDING)], {
+            'unique': True,
+            'partialFilterExpression': {'sessionId': {'$type': 'string'}}
+        }),
+        ([('syncId', ASCENDING)], {
+            'unique': True,
+            'partialFilterExpression': {'syncId': {'$type': 'string'}}
+        }),
+        # only sessions still in progress expire; completed records stay
+        ([('updatedAt', ASCENDING)], {
+            'expireAfterSeconds': ACCREDITATION_SESSION_TTL,
+            'partialFilterExpression': {'status': 'in-progress'}
+        }),
+    ],
+    'voters': [
+        [('VIN', ASCENDING)],
+        [('vinSuffix', ASCENDING), ('polling_unit', ASCENDING)],
+        [('lga', ASCENDING), ('ward', ASCENDING), ('polling_unit', ASCENDING), ('updatedAt', ASCENDING)],
+    ],
+    'ocr_cache': [
+        ([('createdAt', ASCENDING)], {'expireAfterSeconds': OCR_CACHE_TTL}),
+    ],
+    'whatsapp_messages': [
+        ([('createdAt', ASCENDING)], {'expireAfterSeconds': WHATSAPP_DEDUPE_TTL}),
+    ],
+    'ocr_jobs': [
+        [('status', ASCENDING), ('createdAt', ASCENDING)],
+    ],
+    'auth': [
+        ([('token', ASCENDING)], {'unique': True}),
+        [('user_id', ASCENDING)],
+    ],
+    'chairman': CANDIDATE_INDEXES,
+    'deputy_chairman': CANDIDATE_INDEXES,
+    'councillors': CANDIDATE_INDEXES,
+    'voter_bundles': [
+        [('lga', ASCENDING), ('ward', ASCENDING), ('polling_unit', ASCENDING)],
+    ],
+    'users': [
+        [('polling_unit', ASCENDING)],
+    ],
+    'polling_units': [
+        [('ward', ASCENDING), ('name', ASCENDING), ('state_code', ASCENDING)],
+        [('lga', ASCENDING), ('ward', ASCENDING)],
+        [('ward', ASCENDING)],
+    ],
+    'political_parties': [
+        [('id', ASCENDING)],
+    ],
+}
+
+# The natural keys seed.py upserts on. Databases loaded before seed.py hold
+# duplicates of them, so they are only made unique by seed.make_keys_unique,
+# after it has merged the duplicates, never on app start.
+UNIQUE_KEYS = {
+    'voters': [('VIN', ASCENDING)],
+    'polling_units': [('ward', ASCENDING), ('name', ASCENDING), ('state_code', ASCENDING)],
+    'political_parties': [('id', ASCENDING)],
+}
+
+
+def ensure_indexes():
+    for collection, indexes in INDEXES.items():
+        for index in indexes:
+            keys, options = index if isinstance(index, tuple) else (index, {})
+            try:
+                db[collection].create_index(keys, **options)
+            except OperationFailure as e:
+                if e.code not in (INDEX_OPTIONS_CONFLICT, INDEX_KEY_SPECS_CONFLICT):
+                    raise
+                logger.info('Keeping the existing %s index on %s: %s', collection, keys, e)
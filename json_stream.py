@@ -0,0 +1,61 @@
+import json
+import re
+
+# Record-at-a-time readers for import files too large to json.load: a JSON
+# array of objects is decoded incrementally from fixed-size chunks, NDJSON
+# (.ndjson / .jsonl) line by line. An object_hook such as
+# bson.json_util.object_hook decodes Extended JSON ($oid, $date) on the way.
+
+CHUNK_SIZE = 1 << 20
+SEPARATORS = re.compile(r'[\s,]*')
+WHITESPACE = re.compile(r'\s*')
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE, object_hook=None):
+    decoder = json.JSONDecoder(object_hook=object_hook)
+    buffer = ''
+    while not buffer:
+        chunk = f.read(chunk_size)
+        buffer = chunk.lstrip()
+        if not chunk:
+            break
+    if not buffer.startswith('['):
+        raise ValueError('expected a JSON array')
+    pos, eof = 1, False
+    while True:
+        pos = SEPARATORS.match(buffer, pos).end()
+        if pos < len(buffer) and buffer[pos] == ']':
+            return
+        try:
+            if pos == len(buffer):
+                raise json.JSONDecodeError('need more data', buffer, pos)
+            record, end = decoder.raw_decode(buffer, pos)
+            # a record is only complete once the ',' or ']' after it is read:
+            # a number cut at the chunk boundary decodes as a shorter number
+            after = WHITESPACE.match(buffer, end).end()
+            if after == len(buffer) or buffer[after] not in ',]':
+                raise json.JSONDecodeError("expected ',' or ']'", buffer, after)
+            pos = end
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # the next record straddles the chunk boundary
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield record
+
+
+def iter_ndjson(f, object_hook=None):
+    for line in f:
+        if line.strip():
+            yield json.loads(line, object_hook=object_hook)
+
+
+def iter_records(path, object_hook=None):
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.ndjson', '.jsonl')):
+            yield from iter_ndjson(f, object_hook)
+        else:
+            yield from iter_json_array(f, object_hook=object_hook)
@@ -0,0 +1,222 @@
+import json
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import ACCREDITATION_EVENTS, db
+
+# Live accreditation counters pushed to dashboards over server-sent events.
+#
+# Counters are kept per polling unit: `accredited` and `rejected` by status,
+# and `manual` / `auto` for completed accreditations by type. They are seeded
+# from one aggregation when the first dashboard connects and then kept up to
+# date by deltas, which come either from the accreditation write paths in this
+# process (ACCREDITATION_EVENTS=local, correct only with a single process) or
+# from a Mongo change stream that sees every process's writes
+# (ACCREDITATION_EVENTS=change_stream, needs a replica set). There is no
+# default: with several gunicorn workers `local` silently undercounts, so the
+# live endpoint refuses to start until one is chosen.
+#
+# Every delta carries its record's _id and the updatedAt its write stored.
+# Seeding aggregates the records written more than LOAD_MARGIN before it
+# started and reads the few newer ones by _id; deltas arriving meanwhile are
+# replayed only for newer records it did not read, so a write racing the
+# seed is counted once.
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIBER_QUEUE_SIZE = 1000
+KEEPALIVE_SECONDS = 15
+SOURCES = ('local', 'change_stream')
+# longer than any write takes to commit after computing its updatedAt
+LOAD_MARGIN = timedelta(seconds=60)
+
+
+def as_stored(moment):
+    # Mongo keeps milliseconds and returns naive UTC datetimes
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.astimezone(timezone.utc).replace(microsecond=moment.microsecond // 1000 * 1000)
+
+
+def changes_for(status, accreditation_type):
+    changes = {}
+    if status == 'completed':
+        changes['accredited'] = 1
+        if accreditation_type in ('manual', 'auto'):
+            changes[accreditation_type] = 1
+    elif status == 'rejected':
+        changes['rejected'] = 1
+    return changes
+
+
+class Subscriber:
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+
+class LiveCounters:
+    def __init__(self, collection, source=ACCREDITATION_EVENTS):
+        self.collection = collection
+        self.source = source
+        self.units = None
+        self.subscribers = set()
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self._pending = None
+        self._watcher = None
+
+    def _load(self, cutoff):
+        """Counters for every finished record, and the _ids of those written
+        since `cutoff`."""
+        units = {}
+
+        def add(polling_unit, status, accreditation_type, count):
+            unit = units.setdefault(polling_unit, {})
+            for name in changes_for(status, accreditation_type):
+                unit[name] = unit.get(name, 0) + count
+
+        finished = {'$in': ['completed', 'rejected']}
+        pipeline = [
+            # records without updatedAt predate it and are always settled
+            {'$match': {'status': finished, 'updatedAt': {'$not': {'$gte': cutoff}}}},
+            {'$group': {'_id': {'pollingUnit': '$polling_unit', 'status': '$status', 'type': '$type'}, 'count': {'$sum': 1}}}
+        ]
+        for row in self.collection.aggregate(pipeline):
+            add(row['_id'].get('pollingUnit'), row['_id'].get('status'), row['_id'].get('type'), row['count'])
+        counted = set()
+        recent = {'status': finished, 'updatedAt': {'$gte': cutoff}}
+        for document in self.collection.find(recent, {'polling_unit': 1, 'status': 1, 'type': 1}):
+            add(document.get('polling_unit'), document.get('status'), document.get('type'), 1)
+            counted.add(document['_id'])
+        return units, counted
+
+    def snapshot(self):
+        # caller holds self.lock
+        totals = {}
+        for unit in self.units.values():
+            for name, count in unit.items():
+                totals[name] = totals.get(name, 0) + count
+        return {'pollingUnits': {name: dict(unit) for name, unit in self.units.items()}, 'totals': totals}
+
+    def subscribe(self):
+        """Register a subscriber and return it with the snapshot its deltas
+        apply to."""
+        if self.source == 'change_stream':
+            self._start_watcher()
+        with self.load_lock:
+            if self.units is None:
+                # deltas arriving while the aggregation runs are held back and
+                # replayed when their write is one the aggregation left out
+                with self.lock:
+                    self._pending = []
+                    cutoff = as_stored(datetime.now(timezone.utc) - LOAD_MARGIN)
+                try:
+                    units, counted = self._load(cutoff)
+                except Exception:
+                    with self.lock:
+                        self._pending = None
+                    raise
+                with self.lock:
+                    self.units = units
+                    pending, self._pending = self._pending, None
+                for delta in pending:
+                    if delta[4] >= cutoff and delta[3] not in counted:
+                        self.apply(*delta)
+        subscriber = Subscriber()
+        with self.lock:
+            self.subscribers.add(subscriber)
+            return subscriber, self.snapshot()
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def apply(self, polling_unit, status, accreditation_type, accreditation_id, updated_at):
+        """`accreditation_id` and `updated_at` are the _id and updatedAt of
+        the record written."""
+        changes = changes_for(status, accreditation_type)
+        if not changes:
+            return
+        delta = {'pollingUnit': polling_unit, 'changes': changes}
+        with self.lock:
+            if self.units is None:
+                # nobody is watching yet; the first subscriber loads from the db
+                if self._pending is not None:
+                    self._pending.append((polling_unit, status, accreditation_type, accreditation_id,
+                                          as_stored(updated_at)))
+                return
+            unit = self.units.setdefault(polling_unit, {})
+            for name, value in changes.items():
+                unit[name] = unit.get(name, 0) + value
+            for subscriber in self.subscribers:
+                try:
+                    subscriber.queue.put_nowait(delta)
+                except queue.Full:
+                    subscriber.overflowed = True
+
+    def record_accreditation(self, polling_unit, status, accreditation_type, accreditation_id, updated_at):
+        """Called by the accreditation write paths after a successful write,
+        with the record's _id and the updatedAt the write stored."""
+        if self.source == 'local':
+            self.apply(polling_unit, status, accreditation_type, accreditation_id, updated_at)
+
+    def _start_watcher(self):
+        with self.lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name='accreditation-change-stream', daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        pipeline = [{'$match': {
+            'fullDocument.status': {'$in': ['completed', 'rejected']},
+            '$or': [
+                {'operationType': 'insert'},
+                {'updateDescription.updatedFields.status': {'$exists': True}}
+            ]
+        }}]
+        resume_token = None
+        while True:
+            try:
+                with self.collection.watch(pipeline, full_document='updateLookup', resume_after=resume_token) as stream:
+                    for change in stream:
+                        resume_token = stream.resume_token
+                        document = change['fullDocument']
+                        self.apply(document.get('polling_unit'), document.get('status'), document.get('type'),
+                                   document['_id'], document.get('updatedAt') or datetime.now(timezone.utc))
+            except Exception:
+                logger.exception('Accreditation change stream failed, restarting')
+                time.sleep(5)
+
+    def stream(self):
+        """Server-sent events: a snapshot, then deltas, with keepalives. A
+        subscriber that falls too far behind gets a fresh snapshot."""
+        subscriber, snapshot = self.subscribe()
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                if subscriber.overflowed:
+                    with self.lock:
+                        subscriber.overflowed = False
+                        subscriber.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+                        snapshot = self.snapshot()
+                    yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+                try:
+                    delta = subscriber.queue.get(timeout=KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: delta\ndata: {json.dumps(delta)}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+
+if ACCREDITATION_EVENTS not in SOURCES:
+    logger.error("ACCREDITATION_EVENTS is %r; /accreditation/live is disabled until it is set to 'change_stream' "
+                 "or, for a single process, 'local'", ACCREDITATION_EVENTS)
+
+live_counters = LiveCounters(db.accreditation)
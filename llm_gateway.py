@@ -0,0 +1,173 @@
+import os
+import random
+import threading
+import time
+
+import openai
+from openai import OpenAI
+
+from config import (LLM_BACKOFF_BASE, LLM_BACKOFF_MAX, LLM_BREAKER_RESET, LLM_BREAKER_THRESHOLD, LLM_MAX_CONCURRENCY,
+                    LLM_MAX_RETRIES, LLM_MODEL, LLM_TIMEOUT)
+from stubs import StubOpenAIClient
+
+# Every model call (OCR, election Q&A, translation) goes through one gateway
+# per process: at most LLM_MAX_CONCURRENCY calls in flight, a deadline per
+# call, jittered exponential backoff on 429 / 5xx / connection errors, and a
+# circuit breaker that fails fast for LLM_BREAKER_RESET seconds after
+# LLM_BREAKER_THRESHOLD consecutive upstream failures. Latency and token
+# counters are kept per operation.
+
+
+class LLMUnavailable(Exception):
+    """The model could not answer in time: the breaker is open, every slot
+    stayed busy until the deadline, or the retries ran out."""
+
+
+def is_retryable(error):
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    status = getattr(error, 'status_code', None)
+    return status == 429 or (status is not None and status >= 500)
+
+
+class CircuitBreaker:
+    def __init__(self, threshold, reset_after):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            return 'half-open' if time.monotonic() - self.opened_at >= self.reset_after else 'open'
+
+    def allow(self):
+        # half-open lets one probe call through; its result closes or reopens
+        # the breaker. A probe that never reports back (it timed out waiting
+        # for a slot) is replaced after another reset_after.
+        state = self.state
+        if state != 'half-open':
+            return state == 'closed'
+        with self.lock:
+            now = time.monotonic()
+            if self.probe_started is not None and now - self.probe_started < self.reset_after:
+                return False
+            self.probe_started = now
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probe_started = None
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class LLMGateway:
+    """Wraps an openai.OpenAI-shaped client. Swap `client` for a
+    stubs.StubOpenAIClient (or anything with chat.completions.create) to
+    run without the network."""
+
+    def __init__(self, client, model=LLM_MODEL, max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT,
+                 max_retries=LLM_MAX_RETRIES, backoff_base=LLM_BACKOFF_BASE, backoff_max=LLM_BACKOFF_MAX,
+                 breaker=None):
+        self.client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(LLM_BREAKER_THRESHOLD, LLM_BREAKER_RESET)
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _record(self, operation, **deltas):
+        with self._lock:
+            stats = self._stats.setdefault(operation, {
+                'calls': 0, 'errors': 0, 'retries': 0, 'rejected': 0, 'latencySeconds': 0.0,
+                'maxLatencySeconds': 0.0, 'promptTokens': 0, 'completionTokens': 0
+            })
+            for name, delta in deltas.items():
+                stats[name] += delta
+            if 'latencySeconds' in deltas:
+                stats['maxLatencySeconds'] = max(stats['maxLatencySeconds'], deltas['latencySeconds'])
+
+    def complete(self, operation, messages, max_tokens=300, timeout=None, **kwargs):
+        """Text of the model's reply to `messages`. Raises LLMUnavailable
+        when the upstream cannot answer within `timeout` seconds."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        if not self.breaker.allow():
+            self._record(operation, rejected=1)
+            raise LLMUnavailable('Model upstream is degraded, try again shortly')
+
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.slots.acquire(timeout=remaining):
+                self._record(operation, rejected=1)
+                raise LLMUnavailable('Model calls are saturated, try again shortly')
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model, messages=messages, max_tokens=max_tokens,
+                    timeout=max(deadline - time.monotonic(), 0.001), **kwargs
+                )
+            except Exception as e:
+                if not is_retryable(e):
+                    # a bad request is our problem, not the upstream's: it
+                    # answered, so this settles a half-open probe as a success
+                    self.breaker.record_success()
+                    self._record(operation, errors=1)
+                    raise
+                self.breaker.record_failure()
+                backoff = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                if attempt >= self.max_retries or not self.breaker.allow() or time.monotonic() + backoff >= deadline:
+                    self._record(operation, errors=1)
+                    raise LLMUnavailable(f'Model call failed: {e}') from e
+            else:
+                self.breaker.record_success()
+                usage = getattr(response, 'usage', None)
+                self._record(operation, calls=1, latencySeconds=time.monotonic() - start,
+                             promptTokens=getattr(usage, 'prompt_tokens', 0) or 0,
+                             completionTokens=getattr(usage, 'completion_tokens', 0) or 0)
+                return response.choices[0].message.content
+            finally:
+                self.slots.release()
+            attempt += 1
+            self._record(operation, retries=1)
+            time.sleep(backoff)
+
+    def stats(self):
+        with self._lock:
+            operations = {name: dict(stats) for name, stats in self._stats.items()}
+        for stats in operations.values():
+            stats['avgLatencySeconds'] = stats['latencySeconds'] / (stats['calls'] or 1)
+        return {
+            'model': self.model,
+            'maxConcurrency': self.max_concurrency,
+            'breaker': self.breaker.state,
+            'operations': operations
+        }
+
+
+def create_client():
+    if os.getenv("OPENAI_CLIENT") == "stub":
+        return StubOpenAIClient()
+    # retries are the gateway's job
+    return OpenAI(api_key=os.getenv("OPENAI_KEY"), max_retries=0)
+
+
+gateway = LLMGateway(create_client())
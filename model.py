@@ -1,24 +1,43 @@
-import os
-
-from openai import OpenAI
-
-from dotenv import load_dotenv
-
-load_dotenv()  # This loads environment variables from .env file
-
-OPENAI_KEY = os.getenv("OPENAI_KEY")
-
-# Set up your OpenAI API key
-openai_client = OpenAI(
-    # This is the default and can be omitted
-    api_key= os.getenv("OPENAI_KEY"),
+import hashlib
+
+from blob_store import InvalidImage, decode_image
+from cache import MongoCacheStore, TieredCache, TTLCache
+from image_preprocessing import preprocess_for_ocr
+from llm_gateway import gateway
+from config import OCR_CACHE_MONGO, OCR_CACHE_SIZE, OCR_CACHE_TTL, db
+
+# Devices retry step 1 with the same card image after a network drop; those
+# retries, and concurrent duplicates, are answered from here.
+ocr_cache = TieredCache(
+    TTLCache(maxsize=OCR_CACHE_SIZE, ttl=OCR_CACHE_TTL),
+    store=MongoCacheStore(db.ocr_cache, OCR_CACHE_TTL) if OCR_CACHE_MONGO else None
 )
-THIS_MODEL = "gpt-4o-mini"
 
-def decode_image_to_ocr(base64_image):
+# What the model is asked to extract; accreditation uses 'voter_card', the
+# /voters_card_ocr endpoint 'voter_card_status'
+OCR_PROMPTS = {
+    'voter_card': "Extract in json format the VIN, DOB and full name if it's a Voter's card. If not, just say \"No Voter ID\". Please just the json itself, no markdown or newlines or escape characters",
+    'voter_card_status': "Extract in json format the VIN, DOB and fullname if it's a Voter's card. If not, just return {'status': False}. Please just the json itself, no markdown or newlines or escape characters",
+}
+
+def ocr_cache_key(base64_image, prompt='voter_card'):
+    try:
+        data = decode_image(base64_image)
+    except InvalidImage:
+        data = str(base64_image).encode('utf-8')
+    return f"{gateway.model}:{prompt}:{hashlib.sha256(data).hexdigest()}"
+
+def decode_image_to_ocr(base64_image, prompt='voter_card'):
+    # keyed on the original image, so cache hits skip preprocessing too
+    return ocr_cache.get_or_compute(
+        ocr_cache_key(base64_image, prompt),
+        lambda: request_ocr(preprocess_for_ocr(base64_image), prompt)
+    )
+
+def request_ocr(base64_image, prompt='voter_card'):
     # Send the request to the OpenAI API
-    response = openai_client.chat.completions.create(
-        model=THIS_MODEL,
+    return gateway.complete(
+        'ocr',
         messages=[
             {
                 "role": "system",
@@ -27,15 +46,10 @@ def decode_image_to_ocr(base64_image):
             {
                 "role": "user",
                 "content": [
-                    {"type": "text", "text": "Extract in json format the VIN, DOB and full name if it's a Voter's card. If not, just say \"No Voter ID\". Please just the json itself, no markdown or newlines or escape characters"},
+                    {"type": "text", "text": OCR_PROMPTS[prompt]},
                     {"type": "image_url", "image_url": {"url": f"{base64_image}"}}
                 ]
             }
         ],
         max_tokens=300
     )
-
-    # Extract the description
-    description = response.choices[0].message.content
-
-    return description
\ No newline at end of file
@@ -0,0 +1,160 @@
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from pymongo import ReturnDocument
+
+# OCR requests are queued and answered by a fixed pool of worker threads, so a
+# slow model call holds a pool thread instead of a gunicorn worker. Job state
+# lives in a store (Mongo in production) so queued jobs survive a restart.
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+# how often get(wait=...) re-reads a job that another process is running
+POLL_INTERVAL = 0.25
+
+
+class QueueFull(Exception):
+    pass
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class MongoJobStore:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def create(self, job):
+        self.collection.insert_one(job)
+
+    def get(self, job_id):
+        return self.collection.find_one({'_id': job_id})
+
+    def claim(self, job_id):
+        # atomic queued -> running, so only one process runs a recovered job
+        return self.collection.find_one_and_update(
+            {'_id': job_id, 'status': QUEUED},
+            {'$set': {'status': RUNNING, 'updatedAt': utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def finish(self, job_id, status, **fields):
+        self.collection.update_one({'_id': job_id}, {'$set': {'status': status, 'updatedAt': utcnow(), **fields}})
+
+    def recover(self, stale_after, limit):
+        """Requeue jobs left running by a dead process and return the ids of
+        queued jobs, oldest first."""
+        self.collection.update_many(
+            {'status': RUNNING, 'updatedAt': {'$lt': utcnow() - stale_after}},
+            {'$set': {'status': QUEUED, 'updatedAt': utcnow()}}
+        )
+        cursor = self.collection.find({'status': QUEUED}, {'_id': 1}).sort('createdAt', 1).limit(limit)
+        return [job['_id'] for job in cursor]
+
+
+class OCRJobQueue:
+    """Bounded OCR worker pool.
+
+    `ocr` takes a base64 image and returns the model's text; `load_image`
+    returns the base64 image for a stored image id. Both are injected so the
+    pool can run against a stub model client.
+    """
+
+    def __init__(self, store, ocr, load_image, workers=4, max_queue=100, stale_after=timedelta(minutes=5)):
+        self.store = store
+        self.ocr = ocr
+        self.load_image = load_image
+        self.workers = workers
+        self.stale_after = stale_after
+        self.queue = queue.Queue(maxsize=max_queue)
+        self._done = {}
+        self._lock = threading.Lock()
+        self._started = False
+
+    def start(self):
+        # started lazily, so threads are created after gunicorn forks
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for job_id in self.store.recover(self.stale_after, self.queue.maxsize):
+            self._enqueue(job_id)
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f'ocr-worker-{i}', daemon=True).start()
+
+    def _enqueue(self, job_id):
+        with self._lock:
+            self._done.setdefault(job_id, threading.Event())
+        try:
+            self.queue.put_nowait(job_id)
+        except queue.Full:
+            with self._lock:
+                self._done.pop(job_id, None)
+            raise QueueFull()
+
+    def submit(self, image_id):
+        """Queue an OCR job for a stored image. Raises QueueFull when the
+        queue is at capacity, so callers can shed load instead of waiting."""
+        self.start()
+        if self.queue.full():
+            raise QueueFull()
+        job_id = str(uuid.uuid4())
+        now = utcnow()
+        self.store.create({'_id': job_id, 'status': QUEUED, 'imageId': image_id, 'createdAt': now, 'updatedAt': now})
+        try:
+            self._enqueue(job_id)
+        except QueueFull:
+            self.store.finish(job_id, FAILED, error='OCR queue is full')
+            raise
+        return job_id
+
+    def get(self, job_id, wait=0):
+        """Job document, waiting up to `wait` seconds for it to finish. A job
+        queued by this process is awaited directly; one queued by another
+        gunicorn worker is re-read from the store until it finishes."""
+        # the first poll after a restart also picks up the jobs left queued
+        self.start()
+        job = self.store.get(job_id)
+        if not wait or not job or job['status'] not in (QUEUED, RUNNING):
+            return job
+        deadline = time.monotonic() + wait
+        with self._lock:
+            done = self._done.get(job_id)
+        if done:
+            done.wait(wait)
+            return self.store.get(job_id)
+        while job and job['status'] in (QUEUED, RUNNING):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(POLL_INTERVAL, remaining))
+            job = self.store.get(job_id)
+        return job
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def _work(self):
+        while True:
+            job_id = self.queue.get()
+            try:
+                job = self.store.claim(job_id)
+                if job:
+                    self._run(job)
+            finally:
+                with self._lock:
+                    done = self._done.pop(job_id, None)
+                if done:
+                    done.set()
+                self.queue.task_done()
+
+    def _run(self, job):
+        try:
+            result = self.ocr(self.load_image(job['imageId']))
+        except Exception as e:
+            self.store.finish(job['_id'], FAILED, error=str(e))
+        else:
+            self.store.finish(job['_id'], DONE, result=result)
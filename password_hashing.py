@@ -0,0 +1,37 @@
+from concurrent.futures import TimeoutError
+
+import bcrypt
+
+from config import HASH_QUEUE_SIZE, HASH_TIMEOUT, HASH_WORKERS
+from workers import BoundedExecutor, Overloaded
+
+# bcrypt is deliberately slow and releases the GIL while it works, so hashing
+# runs on a small bounded pool: request threads wait on it without burning a
+# gunicorn worker's CPU, and a login storm beyond the queue limit fails fast
+# with Overloaded instead of piling up.
+
+hash_executor = BoundedExecutor(HASH_WORKERS, HASH_QUEUE_SIZE, name='bcrypt')
+
+
+def _hash(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+
+def _run(fn, *args):
+    try:
+        return hash_executor.run(fn, *args, timeout=HASH_TIMEOUT)
+    except TimeoutError:
+        # queued behind too much work; treat it like a full queue
+        raise Overloaded('bcrypt timed out')
+
+
+def hash_password(password):
+    return _run(_hash, password)
+
+
+def check_password(password, hashed):
+    return _run(_check, password, hashed)
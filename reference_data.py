@@ -0,0 +1,76 @@
+import hashlib
+import threading
+import time
+
+from flask import Response, request
+
+import encoder
+from config import REFERENCE_DATA_CHECK_INTERVAL, db
+
+# Political parties, wards and polling units do not change during an election,
+# so each is loaded once per process, serialized once and served with a strong
+# ETag (the sha256 of the body). Re-imports call bump_version(), which bumps a
+# counter in db.reference_versions; every process checks that counter at most
+# once per REFERENCE_DATA_CHECK_INTERVAL seconds and reloads when it moves.
+
+versions_collection = db.reference_versions
+
+
+class ReferenceDataset:
+    def __init__(self, name, loader, max_age=300):
+        self.name = name
+        self.loader = loader
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.body = None
+        self.etag = None
+        self.version = None
+        self.checked_at = 0
+
+    def _current_version(self):
+        doc = versions_collection.find_one({'_id': self.name})
+        return doc['version'] if doc else 0
+
+    def get(self):
+        """(body, etag), loading or reloading the dataset when needed."""
+        with self.lock:
+            now = time.monotonic()
+            if self.body is not None and now - self.checked_at < REFERENCE_DATA_CHECK_INTERVAL:
+                return self.body, self.etag
+            version = self._current_version()
+            self.checked_at = now
+            if self.body is None or version != self.version:
+                self.body = encoder.dumps_bytes(self.loader())
+                self.etag = hashlib.sha256(self.body).hexdigest()
+                self.version = version
+            return self.body, self.etag
+
+    def invalidate(self):
+        with self.lock:
+            self.body = None
+
+    def response(self):
+        body, etag = self.get()
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = self.max_age
+        response.cache_control.must_revalidate = True
+        # answers If-None-Match with 304 and an empty body
+        return response.make_conditional(request)
+
+
+datasets = {}
+
+
+def register(name, loader, max_age=300):
+    datasets[name] = ReferenceDataset(name, loader, max_age)
+    return datasets[name]
+
+
+def bump_version(name):
+    """Invalidation hook for re-imports: every process reloads `name` within
+    REFERENCE_DATA_CHECK_INTERVAL seconds, this one immediately."""
+    versions_collection.update_one({'_id': name}, {'$inc': {'version': 1}}, upsert=True)
+    if name in datasets:
+        datasets[name].invalidate()
@@ -1,21 +1,72 @@
 import json
-import random
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, request, jsonify, send_file, stream_with_context
 from model import decode_image_to_ocr
-from config import db
+from llm_gateway import LLMUnavailable
+from config import OCR_QUEUE_SIZE, OCR_WORKERS, db
+import gazetteer
+from voters import VIN_SUFFIX_LENGTH, normalize_vin, vin_query
+from blob_store import InvalidImage, create_blob_store, load_image, store_image
+from ocr_jobs import DONE, MongoJobStore, OCRJobQueue, QueueFull
+from live_counters import SOURCES, live_counters
 import uuid
 from datetime import datetime, timezone
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from marshmallow import ValidationError
+from decorators import get_int_arg, validate_schema
+from schema import AccreditationSyncSchema, OfflineAccreditationSchema
 from flasgger import swag_from
 
 routes_accreditation = Blueprint('accreditation_routes', __name__)
 
 accreditation_collection = db.accreditation
 voter_collection = db.voters
+blob_store = create_blob_store()
+ocr_job_queue = OCRJobQueue(
+    MongoJobStore(db.ocr_jobs),
+    ocr=decode_image_to_ocr,
+    load_image=lambda image_id: load_image(blob_store, image_id),
+    workers=OCR_WORKERS,
+    max_queue=OCR_QUEUE_SIZE
+)
+
+# Images are served by /images/<digest>; records written before the blob store
+# may still embed base64 copies, which the dashboard never needs.
+DASHBOARD_PROJECTION = {
+    'voterCardImage': 0,
+    'faceCaptureImage': 0,
+    'voterDetails.voterCardImage': 0,
+    'voterDetails.faceCaptureImage': 0
+}
 
 # Helper function to generate a unique session ID
 def generate_session_id():
     return str(uuid.uuid4())
 
+# Helper function to move an in-progress auto session from `step` to the next
+# one in a single guarded round trip. Returns (record, None), or (None, error
+# response) when the session is unknown or on another step.
+def advance_session(session_id, step, update):
+    record = accreditation_collection.find_one_and_update(
+        {'sessionId': session_id, 'status': 'in-progress', 'step': step},
+        update,
+        projection={'_id': 1, 'sessionId': 1, 'step': 1, 'status': 1, 'polling_unit': 1, 'type': 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if record:
+        return record, None
+
+    current = accreditation_collection.find_one({'sessionId': session_id}, {'step': 1, 'status': 1})
+    if not current:
+        return None, (jsonify({'message': 'Session not found'}), 404)
+    return None, (jsonify({
+        'message': f'Session is not at step {step}',
+        'step': current.get('step'),
+        'status': current.get('status')
+    }), 409)
+
 
 # Auto Accreditation: 3 steps
 @routes_accreditation.route('/auto-accreditation/start', methods=['POST'])
@@ -34,11 +85,13 @@ def generate_session_id():
 })
 def start_auto_accreditation():
     session_id = generate_session_id()
+    now = datetime.now(timezone.utc)
     accreditation_collection.insert_one({
         'sessionId': session_id,
         'step': 1,
         'status': 'in-progress',
-        'createdAt': datetime.now(timezone.utc),
+        'createdAt': now,
+        'updatedAt': now,
         "type": "auto"
     })
     return jsonify({'message': 'Auto accreditation started', 'sessionId': session_id}), 201
@@ -57,8 +110,15 @@ def start_auto_accreditation():
             'name': 'voterCardImage',
             'in': 'body',
             'type': 'string',
-            'required': True,
-            'description': 'Voter Card Image'
+            'required': False,
+            'description': 'Voter Card Image, required unless ocrJobId is given'
+        },
+        {
+            'name': 'ocrJobId',
+            'in': 'body',
+            'type': 'string',
+            'required': False,
+            'description': 'Finished /ocr/jobs job for the voter card, instead of voterCardImage'
         }
     ],
     'responses': {
@@ -77,10 +137,22 @@ def auto_accreditation_step1():
     data = request.get_json()
     session_id = data.get('sessionId')
     voter_card_image = data.get('voterCardImage')
+    ocr_job_id = data.get('ocrJobId')
     
     # Verify voter's card image logic here
     try:
-        verification_data = decode_image_to_ocr(voter_card_image)
+        if ocr_job_id:
+            # the card was already read through /ocr/jobs
+            job = ocr_job_queue.get(ocr_job_id)
+            if not job:
+                return jsonify({'message': 'OCR job not found'}), 404
+            if job['status'] != DONE:
+                return jsonify({'message': 'OCR job not finished', 'status': job['status']}), 409
+            verification_data = job['result']
+            voter_card_image_id = job['imageId']
+        else:
+            verification_data = decode_image_to_ocr(voter_card_image)
+            voter_card_image_id = None
         verification_data = json.loads(verification_data)
 
         # print(verification_data, verification_data.get('VIN', '').replace(' ', ''))
@@ -91,11 +163,17 @@ def auto_accreditation_step1():
         if not voter:
             return jsonify({'message': 'Invalid VIN' }), 400
         
-        accreditation_collection.update_one({'sessionId': session_id},{
+        _, error = advance_session(session_id, 1, {
             '$set': {
-                'voterCardImage': voter_card_image, 'step': 2, 'polling_unit': voter.get('polling_unit')
+                'voterCardImageId': voter_card_image_id or store_image(blob_store, voter_card_image),
+                'step': 2, 'polling_unit': voter.get('polling_unit'),
+                'updatedAt': datetime.now(timezone.utc)
             }})
+        if error:
+            return error
         return jsonify({'message': 'Voter\'s card verified, proceed to face verification', 'sessionId': session_id}), 200
+    except LLMUnavailable as e:
+        return jsonify({'message': str(e)}), 503, {'Retry-After': '5'}
     except Exception as e:
         return jsonify({'message': str(e)}), 400
     
@@ -136,8 +214,17 @@ def auto_accreditation_step2():
     face_capture_image = data.get('faceCaptureImage')
     
     # Verify face capture matches voter's card logic here
-    
-    accreditation_collection.update_one({'sessionId': session_id}, {'$set': {'faceCaptureImage': face_capture_image, 'step': 3}})
+
+    try:
+        face_capture_image_id = store_image(blob_store, face_capture_image)
+    except InvalidImage as e:
+        return jsonify({'message': str(e)}), 400
+
+    _, error = advance_session(session_id, 2, {'$set': {
+        'faceCaptureImageId': face_capture_image_id, 'step': 3, 'updatedAt': datetime.now(timezone.utc)
+    }})
+    if error:
+        return error
     return jsonify({'message': 'Face verified, proceed to polling unit verification', 'sessionId': session_id}), 200
 
 @routes_accreditation.route('/auto-accreditation/step3', methods=['POST'])
@@ -169,18 +256,21 @@ def auto_accreditation_step3():
     
     # Verify polling unit logic here
     
-    # Retrieve voter details from previous steps
-    accreditation_record = accreditation_collection.find_one({'sessionId': session_id})
-    voter_details = {
-        'voterCardImage': accreditation_record.get('voterCardImage'),
-        'faceCaptureImage': accreditation_record.get('faceCaptureImage'),
-        'accreditedAt': datetime.now(timezone.utc)
-    }
-
-    # Update the record to complete accreditation
-    accreditation_collection.update_one({'sessionId': session_id}, {'$set': {
-        'status': 'completed', 'voterDetails': voter_details
-    }})
+    # Complete accreditation, copying voter details from previous steps on the
+    # server with a pipeline update
+    now = datetime.now(timezone.utc)
+    record, error = advance_session(session_id, 3, [{'$set': {
+        'status': 'completed',
+        'updatedAt': now,
+        'voterDetails': {
+            'voterCardImageId': '$voterCardImageId',
+            'faceCaptureImageId': '$faceCaptureImageId',
+            'accreditedAt': now
+        }
+    }}])
+    if error:
+        return error
+    live_counters.record_accreditation(record.get('polling_unit'), 'completed', 'auto', record['_id'], now)
     return jsonify({'message': 'Voter accredited successfully', 'sessionId': session_id}), 200
 
 # Manual Accreditation: 2 steps
@@ -234,14 +324,12 @@ def manual_accreditation_step1():
         return jsonify({'message': 'Invalid VIN'}), 400
 
 def verify_vin(vin, polling_unit):
-    if len(vin) > 6:
-        voter = voter_collection.find_one({'VIN': vin, 'polling_unit': polling_unit})
-        return voter
-    elif len(vin) == 6:
-        voter = voter_collection.find_one({"VIN": {"$regex": f"{vin}$"}, 'polling_unit': polling_unit})
-        return voter
-    else:
+    query = vin_query(vin)
+    if not query:
         return None
+    query['polling_unit'] = polling_unit
+    # vinSuffix and updatedAt are index and bundle bookkeeping, not voter details
+    return voter_collection.find_one(query, {'vinSuffix': 0, 'updatedAt': 0})
 
 @routes_accreditation.route('/manual-accreditation/step2', methods=['POST'])
 @swag_from({
@@ -286,36 +374,47 @@ def manual_accreditation_step2():
     face_capture_image = data.get('faceCaptureImage')
 
     # Save the voter's face and card images
-    voter_details = {
-        'vin': vin,
-        'voterCardImage': voter_card_image,
-        'faceCaptureImage': face_capture_image,
-        'accreditedAt': datetime.now(timezone.utc)
-    }
+    try:
+        voter_details = {
+            'vin': vin,
+            'voterCardImageId': store_image(blob_store, voter_card_image),
+            'faceCaptureImageId': store_image(blob_store, face_capture_image),
+            'accreditedAt': datetime.now(timezone.utc)
+        }
+    except InvalidImage as e:
+        return jsonify({'message': str(e)}), 400
 
 
-    voter = voter_collection.find_one({
-        '$or': [
-            {'VIN': vin},
-            {'VIN': {'$regex': f"{vin}$"}}
-        ]
-    })
+    query = vin_query(vin)
+    voter = voter_collection.find_one(query) if query else None
 
     if not voter:
         return jsonify({'message': 'Voter not found'}), 404
     
-    accreditation_collection.insert_one({
+    updated_at = datetime.now(timezone.utc)
+    inserted = accreditation_collection.insert_one({
         'status': 'completed',
         'voterDetails': voter_details,
         "polling_unit": voter.get('polling_unit'),
-        "type": "manual"
+        "type": "manual",
+        'updatedAt': updated_at
     })
+    live_counters.record_accreditation(voter.get('polling_unit'), 'completed', 'manual', inserted.inserted_id,
+                                       updated_at)
 
     # add accreditation record with polling unit 
     return jsonify({'message': 'Voter accredited successfully'}), 201
 
 @routes_accreditation.route('/accreditation-dashboard', methods=['GET'])
 @swag_from({
+    'parameters': [
+        {'name': 'pollingUnit', 'in': 'query', 'type': 'string', 'required': False, 'description': 'Filter by polling unit'},
+        {'name': 'status', 'in': 'query', 'type': 'string', 'required': False, 'description': 'Filter by status, e.g. completed'},
+        {'name': 'type', 'in': 'query', 'type': 'string', 'required': False, 'description': 'Filter by accreditation type (auto or manual)'},
+        {'name': 'after', 'in': 'query', 'type': 'string', 'required': False, 'description': 'nextCursor from the previous page'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Records per page (max 1000)'},
+        {'name': 'format', 'in': 'query', 'type': 'string', 'required': False, 'description': 'ndjson to stream every matching record, one per line'}
+    ],
     'responses': {
         200: {
             'description': 'Accreditation dashboard',
@@ -328,94 +427,491 @@ def manual_accreditation_step2():
                             'status': 'completed',
                             'voterDetails': {
                                 'vin': 'Voter Identification Number',
-                                'voterCardImage': 'Voter Card Image',
-                                'faceCaptureImage': 'Face Capture Image',
+                                'voterCardImageId': 'Voter Card Image digest',
+                                'faceCaptureImageId': 'Face Capture Image digest',
                                 'accreditedAt': 'Accreditation Date'
                             }
                         }
-                    ]
+                    ],
+                    'nextCursor': '66f1c0d2e4b0a1b2c3d4e5f6'
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid cursor',
+            'examples': {
+                'application/json': {
+                    'message': 'Invalid cursor'
                 }
             }
         }
     }
 })
 def accreditation_dashboard():
-    accreditation_records = list(accreditation_collection.find())
+    query = {}
+    for arg, field in (('pollingUnit', 'polling_unit'), ('status', 'status'), ('type', 'type')):
+        if request.args.get(arg):
+            query[field] = request.args.get(arg)
+
+    # keyset pagination, newest first: _id is time-ordered, so this also
+    # orders by creation time without a skip
+    after = request.args.get('after')
+    if after:
+        try:
+            query['_id'] = {'$lt': ObjectId(after)}
+        except InvalidId:
+            return jsonify({'message': 'Invalid cursor'}), 400
+
+    cursor = accreditation_collection.find(query, DASHBOARD_PROJECTION).sort('_id', -1)
+
+    if request.args.get('format') == 'ndjson':
+        if request.args.get('limit'):
+            cursor = cursor.limit(get_int_arg('limit', 1000))
+        json_provider = current_app.json
+
+        def generate():
+            for record in cursor.batch_size(500):
+                yield json_provider.dumps(record) + '\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    limit = get_int_arg('limit', 100, maximum=1000)
+    accreditation_records = list(cursor.limit(limit))
+    next_cursor = str(accreditation_records[-1]['_id']) if len(accreditation_records) == limit else None
     return jsonify({'message': 'Accreditation dashboard', 
-                    'accreditationRecords': accreditation_records}), 200
+                    'accreditationRecords': accreditation_records,
+                    'nextCursor': next_cursor}), 200
+
+
+@routes_accreditation.route('/images/<digest>', methods=['GET'])
+@swag_from({
+    'parameters': [
+        {
+            'name': 'digest',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'sha256 digest stored as voterCardImageId or faceCaptureImageId'
+        }
+    ],
+    'responses': {
+        200: {'description': 'Image bytes'},
+        404: {'description': 'Image not found'}
+    }
+})
+def get_image(digest):
+    try:
+        f, content_type = blob_store.open(digest)
+    except KeyError:
+        return jsonify({'message': 'Image not found'}), 404
+    # blobs are content-addressed, so the digest is a permanent ETag
+    return send_file(f, mimetype=content_type, etag=digest, max_age=31536000, conditional=True)
     
     
-def load_wards():
-    with open('data/wards.json') as f:
-        wards_data = json.load(f)
-        return wards_data
+def polling_units_pipeline(query, skip, limit):
+    # One round trip: the page of units with their accreditation counts and
+    # officer, the total number of matching units, and the totals by status
+    # and type across every matching unit.
+    return [
+        {'$match': query},
+        {'$facet': {
+            'pollingUnits': [
+                {'$sort': {'_id': 1}},
+                {'$skip': skip},
+                {'$limit': limit},
+                {'$lookup': {
+                    'from': 'accreditation',
+                    'localField': 'name',
+                    'foreignField': 'polling_unit',
+                    'pipeline': [
+                        {'$match': {'status': {'$in': ['completed', 'rejected']}}},
+                        {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+                    ],
+                    'as': 'accreditationCounts'
+                }},
+                {'$lookup': {
+                    'from': 'users',
+                    'localField': 'name',
+                    'foreignField': 'polling_unit',
+                    'pipeline': [
+                        {'$project': {'password': 0}},
+                        {'$limit': 1}
+                    ],
+                    'as': 'pollingUnitOfficer'
+                }},
+                {'$addFields': {
+                    'pollingUnitOfficer': {'$first': '$pollingUnitOfficer'}
+                }}
+            ],
+            'total': [
+                {'$count': 'count'}
+            ],
+            'totals': [
+                {'$group': {'_id': None, 'names': {'$push': '$name'}}},
+                {'$lookup': {
+                    'from': 'accreditation',
+                    'localField': 'names',
+                    'foreignField': 'polling_unit',
+                    'pipeline': [
+                        {'$group': {
+                            '_id': None,
+                            'totalAccredited': {'$sum': {'$cond': [{'$eq': ['$status', 'completed']}, 1, 0]}},
+                            'totalRejected': {'$sum': {'$cond': [{'$eq': ['$status', 'rejected']}, 1, 0]}},
+                            'totalManual': {'$sum': {'$cond': [{'$eq': ['$type', 'manual']}, 1, 0]}},
+                            'totalAuto': {'$sum': {'$cond': [{'$eq': ['$type', 'auto']}, 1, 0]}}
+                        }}
+                    ],
+                    'as': 'totals'
+                }},
+                {'$unwind': '$totals'},
+                {'$replaceRoot': {'newRoot': '$totals'}}
+            ]
+        }}
+    ]
 
 
 @routes_accreditation.route('/polling-units', methods=['GET'])
+@swag_from({
+    'parameters': [
+        {'name': 'lga', 'in': 'query', 'type': 'string', 'required': False, 'description': 'Filter by LGA'},
+        {'name': 'ward', 'in': 'query', 'type': 'string', 'required': False, 'description': 'Filter by ward'},
+        {'name': 'page', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Page number, starting at 1'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Polling units per page (max 500)'}
+    ],
+    'responses': {
+        200: {
+            'description': 'Polling units with accreditation counts',
+            'examples': {
+                'application/json': {
+                    'pollingUnits': [],
+                    'page': 1,
+                    'limit': 50,
+                    'total': 0,
+                    'totalAccredited': 0,
+                    'totalRejected': 0,
+                    'totalManual': 0,
+                    'totalAuto': 0
+                }
+            }
+        }
+    }
+})
 def get_polling_units():
-    polling_units = list(db.polling_units.find().limit(50))
-    totalManualAccreditations = accreditation_collection.count_documents({
-        'type': 'manual'
-    })
+    page = get_int_arg('page', 1)
+    limit = get_int_arg('limit', 50, maximum=500)
+    lga = request.args.get('lga')
+    ward = request.args.get('ward')
+
+    query = {}
+    if lga:
+        # units not yet enriched with an lga are matched through their ward
+        query['$or'] = [
+            {'lga': {'$in': [lga, gazetteer.normalize_lga(lga)]}},
+            {'ward': {'$in': gazetteer.wards_in_lga(lga)}}
+        ]
+    if ward:
+        query['ward'] = ward
+
+    pipeline = polling_units_pipeline(query, (page - 1) * limit, limit)
+    result = next(db.polling_units.aggregate(pipeline))
+
+    polling_units = result['pollingUnits']
+    total = result['total'][0]['count'] if result['total'] else 0
+    totals = result['totals'][0] if result['totals'] else {}
 
-    totalAutoAccreditations = accreditation_collection.count_documents({
-        'type': 'auto'
-    })
-    if len(polling_units) == 0:
-        # dump polling unit data 
-        with open('data/polling_units.json') as f:
-            data = json.load(f)
-            db.polling_units.insert_many(data)
-        polling_units = list(db.polling_units.find().limit(50))
-        return jsonify({'pollingUnits': polling_units}), 200
-    
-    totalAccredited = 0
-    totalRejected = 0
-    
-    wards_data = load_wards()
-    
     for unit in polling_units:
-        # get accredited, get rejected
-        accreditedVoters = accreditation_collection.count_documents({
-            'polling_unit': unit.get('name'), 
-            'status': 'completed'
-        })
-        
-        unit['accredited'] = accreditedVoters
-        
-        totalAccredited += accreditedVoters
-        
-        rejectedVoters = accreditation_collection.count_documents({
-            'polling_unit': unit.get('name'), 'status': 'rejected'
-        })
-        
-        unit['pollingUnitOfficer'] = db.users.find_one({"polling_unit": unit.get('name')})
-    
-        unit['rejected'] = rejectedVoters
-        
-        totalRejected += rejectedVoters
-        
+        counts = {c['_id']: c['count'] for c in unit.pop('accreditationCounts')}
+        unit['accredited'] = counts.get('completed', 0)
+        unit['rejected'] = counts.get('rejected', 0)
+        unit['pollingUnitOfficer'] = unit.get('pollingUnitOfficer')
+
         if not unit.get('lga'):
-            # find ward with ward name
-            wards = list(filter(lambda obj: obj.get("WARD NAME") == unit.get('ward'), wards_data))
-            if len(wards) > 0:
-                ward = wards[0]
-                db.polling_units.update_one({"_id": unit.get('_id')}, {"$set": {
-                    "lga": ward.get("LGA NAME"),
-                }})
-                unit['lga'] = ward.get("LGA NAME")
-            else:
-                # ******** wards data is incomplete, temporary fix
-                random_lga = random.choice(wards_data).get("LGA NAME")
-                unit['lga'] = random_lga
-                db.polling_units.update_one({"_id": unit.get('_id')}, {"$set": {
-                    "lga": random_lga,
-                }})
-                
+            # None when the ward is missing from wards.json; see
+            # `python gazetteer.py` for the offline backfill and gap report
+            unit['lga'] = gazetteer.lga_for_ward(unit.get('ward'))
+
     return jsonify({
         'pollingUnits': polling_units, 
-        "totalAccredited": totalAccredited, 
-        "totalRejected": totalRejected,
-        "totalManual": totalManualAccreditations,
-        "totalAuto": totalAutoAccreditations
-    }), 200
\ No newline at end of file
+        'page': page,
+        'limit': limit,
+        'total': total,
+        "totalAccredited": totals.get('totalAccredited', 0), 
+        "totalRejected": totals.get('totalRejected', 0),
+        "totalManual": totals.get('totalManual', 0),
+        "totalAuto": totals.get('totalAuto', 0)
+    }), 200
+
+
+@routes_accreditation.route('/ocr/jobs', methods=['POST'])
+@swag_from({
+    'parameters': [
+        {
+            'name': 'image',
+            'in': 'body',
+            'type': 'string',
+            'required': True,
+            'description': 'Voter card image as base64 or a data URL'
+        }
+    ],
+    'responses': {
+        202: {
+            'description': 'OCR job queued',
+            'examples': {
+                'application/json': {
+                    'jobId': 'unique-job-id',
+                    'status': 'queued',
+                    'queueDepth': 3
+                }
+            }
+        },
+        503: {
+            'description': 'OCR queue is full, retry later',
+            'examples': {
+                'application/json': {
+                    'message': 'OCR queue is full, retry later'
+                }
+            }
+        }
+    }
+})
+def submit_ocr_job():
+    data = request.get_json(silent=True) or {}
+    try:
+        image_id = store_image(blob_store, data.get('image'))
+    except InvalidImage as e:
+        return jsonify({'message': str(e)}), 400
+
+    try:
+        job_id = ocr_job_queue.submit(image_id)
+    except QueueFull:
+        return jsonify({'message': 'OCR queue is full, retry later'}), 503, {'Retry-After': '5'}
+
+    return jsonify({'jobId': job_id, 'status': 'queued', 'queueDepth': ocr_job_queue.depth()}), 202
+
+
+@routes_accreditation.route('/ocr/jobs/<job_id>', methods=['GET'])
+@swag_from({
+    'parameters': [
+        {'name': 'job_id', 'in': 'path', 'type': 'string', 'required': True, 'description': 'OCR job ID'},
+        {'name': 'wait', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Seconds to wait for the job to finish (max 30)'}
+    ],
+    'responses': {
+        200: {
+            'description': 'OCR job state',
+            'examples': {
+                'application/json': {
+                    'jobId': 'unique-job-id',
+                    'status': 'done',
+                    'imageId': 'sha256 digest of the image',
+                    'result': '{"VIN": "...", "DOB": "...", "full_name": "..."}'
+                }
+            }
+        },
+        404: {
+            'description': 'OCR job not found',
+            'examples': {
+                'application/json': {
+                    'message': 'OCR job not found'
+                }
+            }
+        }
+    }
+})
+def get_ocr_job(job_id):
+    job = ocr_job_queue.get(job_id, wait=get_int_arg('wait', 0, minimum=0, maximum=30))
+    if not job:
+        return jsonify({'message': 'OCR job not found'}), 404
+    return jsonify({
+        'jobId': job['_id'],
+        'status': job['status'],
+        'imageId': job.get('imageId'),
+        'result': job.get('result'),
+        'error': job.get('error')
+    }), 200
+
+
+# Helper function to resolve the VINs of a sync batch in one query. Returns a
+# function mapping (vin, polling_unit) to a voter or None; short VINs must be
+# unambiguous, within the polling unit when one is given.
+def resolve_vins(vins):
+    full = sorted({vin for vin, _ in vins if len(vin) > VIN_SUFFIX_LENGTH})
+    short = sorted({vin for vin, _ in vins if len(vin) == VIN_SUFFIX_LENGTH})
+    clauses = []
+    if full:
+        clauses.append({'VIN': {'$in': full}})
+    if short:
+        clauses.append({'vinSuffix': {'$in': short}})
+    if not clauses:
+        return lambda vin, polling_unit: None
+
+    by_vin, by_suffix = {}, {}
+    projection = {'VIN': 1, 'vinSuffix': 1, 'polling_unit': 1}
+    for voter in voter_collection.find({'$or': clauses}, projection):
+        by_vin[voter['VIN']] = voter
+        by_suffix.setdefault(voter.get('vinSuffix'), []).append(voter)
+
+    def resolve(vin, polling_unit):
+        if len(vin) > VIN_SUFFIX_LENGTH:
+            return by_vin.get(vin)
+        candidates = by_suffix.get(vin, [])
+        if polling_unit:
+            candidates = [v for v in candidates if v.get('polling_unit') == polling_unit]
+        return candidates[0] if len(candidates) == 1 else None
+
+    return resolve
+
+
+@routes_accreditation.route('/accreditation/sync', methods=['POST'])
+@validate_schema(AccreditationSyncSchema())
+@swag_from({
+    'parameters': [
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': True,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'records': {
+                        'type': 'array',
+                        'items': {
+                            'type': 'object',
+                            'properties': {
+                                'clientId': {'type': 'string', 'description': 'Device-generated record ID, used to make retries idempotent'},
+                                'vin': {'type': 'string'},
+                                'pollingUnit': {'type': 'string'},
+                                'type': {'type': 'string', 'enum': ['auto', 'manual']},
+                                'status': {'type': 'string', 'enum': ['completed', 'rejected']},
+                                'accreditedAt': {'type': 'string', 'format': 'date-time'},
+                                'voterCardImage': {'type': 'string'},
+                                'faceCaptureImage': {'type': 'string'}
+                            },
+                            'required': ['clientId', 'vin']
+                        }
+                    }
+                },
+                'required': ['records']
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Per-record sync results',
+            'examples': {
+                'application/json': {
+                    'message': 'Sync processed',
+                    'created': 1,
+                    'duplicates': 0,
+                    'failed': 1,
+                    'results': [
+                        {'index': 0, 'clientId': 'device-1-0001', 'status': 'created'},
+                        {'index': 1, 'clientId': 'device-1-0002', 'status': 'voter_not_found'}
+                    ]
+                }
+            }
+        }
+    }
+})
+def sync_offline_accreditations():
+    records = request.get_json()['records']
+    record_schema = OfflineAccreditationSchema()
+
+    results = [None] * len(records)
+    valid = []
+    for index, raw in enumerate(records):
+        try:
+            record = record_schema.load(raw)
+        except ValidationError as err:
+            client_id = raw.get('clientId') if isinstance(raw, dict) else None
+            results[index] = {'index': index, 'clientId': client_id, 'status': 'invalid', 'errors': err.messages}
+            continue
+        record['vin'] = normalize_vin(record['vin'])
+        valid.append((index, record))
+
+    resolve = resolve_vins([(record['vin'], record.get('pollingUnit')) for _, record in valid])
+
+    operations, operation_records = [], []
+    synced_at = datetime.now(timezone.utc)
+    for index, record in valid:
+        result = {'index': index, 'clientId': record['clientId']}
+        results[index] = result
+        voter = resolve(record['vin'], record.get('pollingUnit'))
+        if not voter:
+            result['status'] = 'voter_not_found'
+            continue
+        try:
+            voter_details = {
+                'vin': voter['VIN'],
+                'accreditedAt': record.get('accreditedAt', synced_at)
+            }
+            for field in ('voterCardImage', 'faceCaptureImage'):
+                if record.get(field):
+                    voter_details[f'{field}Id'] = store_image(blob_store, record[field])
+        except InvalidImage as e:
+            result.update(status='invalid', errors={'image': [str(e)]})
+            continue
+
+        document = {
+            'syncId': record['clientId'],
+            'status': record['status'],
+            'type': record['type'],
+            'polling_unit': voter.get('polling_unit'),
+            'voterDetails': voter_details,
+            'syncedAt': synced_at,
+            'updatedAt': synced_at
+        }
+        # keyed on the device's record ID, so a retried batch is a no-op
+        operations.append(UpdateOne({'syncId': record['clientId']}, {'$setOnInsert': document}, upsert=True))
+        operation_records.append((index, document))
+
+    if operations:
+        try:
+            upserted = accreditation_collection.bulk_write(operations, ordered=False).upserted_ids
+            write_errors = {}
+        except BulkWriteError as err:
+            # a concurrent retry of the same record loses the race on the
+            # unique syncId index; that is a duplicate, not a failure
+            upserted = {item['index']: item['_id'] for item in err.details.get('upserted', [])}
+            write_errors = {item['index']: item for item in err.details.get('writeErrors', [])}
+        for position, (index, document) in enumerate(operation_records):
+            if position in upserted:
+                results[index]['status'] = 'created'
+                live_counters.record_accreditation(document['polling_unit'], document['status'], document['type'],
+                                                   upserted[position], synced_at)
+            elif position in write_errors and write_errors[position].get('code') != 11000:
+                results[index].update(status='failed', errors={'write': [write_errors[position].get('errmsg')]})
+            else:
+                results[index]['status'] = 'duplicate'
+
+    statuses = [result['status'] for result in results]
+    return jsonify({
+        'message': 'Sync processed',
+        'created': statuses.count('created'),
+        'duplicates': statuses.count('duplicate'),
+        'failed': len(statuses) - statuses.count('created') - statuses.count('duplicate'),
+        'results': results
+    }), 200
+
+
+@routes_accreditation.route('/accreditation/live', methods=['GET'])
+@swag_from({
+    'responses': {
+        200: {
+            'description': 'Server-sent events: a "snapshot" event with per-polling-unit and total counters, '
+                           'then "delta" events as accreditations are recorded',
+            'examples': {
+                'text/event-stream': 'event: delta\ndata: {"pollingUnit": "SHILUR_MARKET", "changes": {"accredited": 1, "manual": 1}}\n\n'
+            }
+        },
+        503: {
+            'description': 'ACCREDITATION_EVENTS is not set'
+        }
+    }
+})
+def live_accreditation_counters():
+    if live_counters.source not in SOURCES:
+        return jsonify({'message': 'Live counters are not configured: set ACCREDITATION_EVENTS'}), 503
+    return Response(stream_with_context(live_counters.stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
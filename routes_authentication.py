@@ -1,14 +1,18 @@
 from flask import Blueprint, request, jsonify
 from config import db, SENDCHAMP_PUBLIC_KEY
 
-import string, random, uuid
+import base64, string, random, uuid
 from datetime import datetime, timedelta, timezone
-import bcrypt, requests
+import requests
 from flasgger import swag_from
 
-from decorators import login_required, validate_schema
-from schema import CouncillorSchema, GenerateChairmanWithDeputySchema, UpdateStatusSchema
-from bson import ObjectId, json_util
+from decorators import get_int_arg, get_request_token, invalidate_token, login_required, validate_schema
+from schema import CandidateSearchSchema, CouncillorSchema, GenerateChairmanWithDeputySchema, UpdateStatusSchema
+from bson import ObjectId
+from bson.errors import InvalidId
+from marshmallow import ValidationError
+from pymongo import DESCENDING, ReturnDocument
+from password_hashing import Overloaded, check_password, hash_executor, hash_password
 
 routes_authentication = Blueprint('authentication_routes', __name__)
 
@@ -26,6 +30,10 @@ def generate_password(length=8):
 def generate_token():
     return str(uuid.uuid4())
 
+# Helper function for the response when the password hashing pool is full
+def server_busy():
+    return jsonify({'message': 'Server busy, please retry shortly'}), 503, {'Retry-After': '2'}
+
 # Helper function to send OTP via sendChamp
 def send_champ_otp(phone_number, first_name):
     url = 'https://api.sendchamp.com/api/v1/verification/create'
@@ -139,7 +147,10 @@ def register_user():
         return jsonify({'message': 'Please provide polling_unit, ward, and lga'}), 400
 
     # Hash the password with bcrypt
-    hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    try:
+        hashed_password = hash_password(password)
+    except Overloaded:
+        return server_busy()
 
     user = {
         'firstName': first_name,
@@ -195,6 +206,14 @@ def register_user():
                     'message': 'Invalid email or password'
                 }
             }
+        },
+        503: {
+            'description': 'Password hashing pool is full, retry shortly',
+            'examples': {
+                'application/json': {
+                    'message': 'Server busy, please retry shortly'
+                }
+            }
         }
     }
 })
@@ -207,7 +226,11 @@ def login():
     if not user:
         return jsonify({'message': 'Invalid email or password'}), 401
     
-    if not bcrypt.checkpw(password.encode('utf-8'), user['password'].encode('utf-8')):
+    try:
+        password_matches = check_password(password, user['password'])
+    except Overloaded:
+        return server_busy()
+    if not password_matches:
         return jsonify({'message': 'Invalid email or password'}), 401
 
     # Generate token and store in auth collection
@@ -221,7 +244,13 @@ def login():
         'is_active': True
     }
 
-    auth_collection.update_one({"user_id": user['_id']}, {"$set": auth_record}, upsert=True)
+    previous = auth_collection.find_one_and_update(
+        {"user_id": user['_id']}, {"$set": auth_record}, projection={'token': 1},
+        upsert=True, return_document=ReturnDocument.BEFORE
+    )
+    if previous:
+        # the user's previous token is replaced, so drop it from the cache
+        invalidate_token(previous.get('token'))
 
     # Send OTP via sendChamp
     # phone_number = user.get('phoneNumber')
@@ -348,16 +377,23 @@ def verify_otp():
     }
 })
 def logout():
-    token = request.headers.get('Authorization')
+    token = get_request_token()
+    if not token:
+        return jsonify({'message': 'Invalid or expired token'}), 400
+    invalidate_token(token)
 
-    auth_record = auth_collection.find_one({'token': token, 'is_active': True})
-    if auth_record:
-        auth_collection.update_one({'_id': auth_record['_id']}, {'$set': {'is_active': False}})
+    result = auth_collection.update_one({'token': token, 'is_active': True}, {'$set': {'is_active': False}})
+    if result.modified_count:
         return jsonify({'message': 'Logout successful'}), 200
     else:
         return jsonify({'message': 'Invalid or expired token'}), 400
 
 
+@routes_authentication.route('/auth/hash-stats', methods=['GET'])
+def password_hashing_stats():
+    return jsonify(hash_executor.stats()), 200
+
+
 @routes_authentication.route('/create-chairman', methods=['POST'])
 @validate_schema(GenerateChairmanWithDeputySchema())
 def create_chairman_with_deputy():
@@ -401,7 +437,7 @@ def get_chairmen():
     ]
 
     chairmen = list(chairman_collection.aggregate(pipeline))
-    return json_util.dumps({"chairmen": chairmen}), 200
+    return jsonify({"chairmen": chairmen}), 200
 
 
 # Endpoint to get all deputy chairmen
@@ -411,55 +447,205 @@ def get_deputy_chairmen():
     return jsonify({"deputy_chairmen": deputy_chairmen}), 200
 
 
-def list_filter(iter, status):
-    return len(list(filter(lambda x: x.get('status') == status, iter)))
-
-@routes_authentication.route('/candidates', methods=['GET'])
-def get_candidates():
-    pipeline = [
-        {
-            "$lookup": {
-                "from": "deputy_chairman",
-                "localField": "deputy",
-                "foreignField": "_id",
-                "as": "deputy",
-            },
-        },
-        {
-            "$unwind": "$deputy"
-        }
+# Fields returned in candidate lists; the full forms (documents, nominators,
+# histories) are only sent with ?full=true
+CANDIDATE_SUMMARY_FIELDS = [
+    'firstName', 'lastName', 'surname', 'otherNames', 'localGovernment', 'ward',
+    'position', 'status', 'in_review', 'createdAt', 'deputy'
+]
+
+
+def candidates_pipeline(skip, limit, full=False):
+    # Runs on a single seed document ($documents), so every $facet branch is a
+    # $lookup whose sub-pipeline queries its own collection with its indexes:
+    # status counts over all three collections plus one sorted page of each list.
+    summary = [] if full else [{'$project': {field: 1 for field in CANDIDATE_SUMMARY_FIELDS}}]
+
+    def branch(collection, pipeline):
+        return [
+            {'$lookup': {'from': collection, 'pipeline': pipeline, 'as': 'items'}},
+            {'$unwind': '$items'},
+            {'$replaceRoot': {'newRoot': '$items'}}
+        ]
+
+    def page(extra_stages=()):
+        return [
+            {'$sort': {'createdAt': -1, '_id': -1}},
+            {'$skip': skip},
+            {'$limit': limit},
+            *summary,
+            *extra_stages
+        ]
+
+    deputy_lookup = [
+        {'$lookup': {
+            'from': 'deputy_chairman',
+            'localField': 'deputy',
+            'foreignField': '_id',
+            'pipeline': summary,
+            'as': 'deputy'
+        }},
+        {'$addFields': {'deputy': {'$first': '$deputy'}}}
     ]
-    
-    chairmen = list(chairman_collection.find())
 
-    for man in chairmen:
-        man['deputy'] = deputy_chairman_collection.find_one({"_id": man['deputy']})
-
-    deputyChairmen = list(deputy_chairman_collection.find())
-    councillors = list(db.councillors.find())
+    status_only = [{'$project': {'_id': 0, 'status': 1}}]
+    return [
+        {'$documents': [{}]},
+        {'$facet': {
+            'statusCounts': branch('chairman', [
+                *status_only,
+                {'$unionWith': {'coll': 'deputy_chairman', 'pipeline': status_only}},
+                {'$unionWith': {'coll': 'councillors', 'pipeline': status_only}},
+                {'$group': {'_id': '$status', 'count': {'$sum': 1}}}
+            ]),
+            'chairmen': branch('chairman', page(deputy_lookup)),
+            'deputyChairmen': branch('deputy_chairman', page()),
+            'councillors': branch('councillors', page())
+        }}
+    ]
 
-    totalSubmissions = len(chairmen) + len(deputyChairmen) + len(councillors)
-    submissionsApproved = list_filter(chairmen, "approved") + list_filter(deputyChairmen, "approved") \
-    + list_filter(councillors, "approved")
 
-    submissionsDeclined = list_filter(chairmen, "rejected") + list_filter(deputyChairmen, "rejected") \
-    + list_filter(councillors, "rejected")
+@routes_authentication.route('/candidates', methods=['GET'])
+@swag_from({
+    'parameters': [
+        {'name': 'page', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Page of each candidate list, starting at 1'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Candidates per list per page (max 200)'},
+        {'name': 'full', 'in': 'query', 'type': 'boolean', 'required': False, 'description': 'Return complete candidate forms instead of summaries'}
+    ],
+    'responses': {
+        200: {
+            'description': 'Submission counts and one page of each candidate list',
+            'examples': {
+                'application/json': {
+                    'totalSubmissions': 0,
+                    'submissionsApproved': 0,
+                    'submissionsDeclined': 0,
+                    'submissionsInReview': 0,
+                    'page': 1,
+                    'limit': 50,
+                    'candidates': {'chairmen': [], 'deputyChairmen': [], 'councillors': []}
+                }
+            }
+        }
+    }
+})
+def get_candidates():
+    page = get_int_arg('page', 1)
+    limit = get_int_arg('limit', 50, maximum=200)
+    full = request.args.get('full', '').lower() in ('1', 'true', 'yes')
 
-    submissionsInReview = list_filter(chairmen, "submitted") + list_filter(deputyChairmen, "submitted") \
-    + list_filter(councillors, "submitted")
+    result = next(db.aggregate(candidates_pipeline((page - 1) * limit, limit, full)))
+    status_counts = {row['_id']: row['count'] for row in result['statusCounts']}
 
     return jsonify({
-        "totalSubmissions": totalSubmissions,
-        "submissionsApproved": submissionsApproved,
-        "submissionsDeclined": submissionsDeclined,
-        "submissionsInReview": submissionsInReview,
+        "totalSubmissions": sum(status_counts.values()),
+        "submissionsApproved": status_counts.get("approved", 0),
+        "submissionsDeclined": status_counts.get("rejected", 0),
+        "submissionsInReview": status_counts.get("submitted", 0),
+        "page": page,
+        "limit": limit,
         "candidates": {
-            "chairmen": chairmen, 
-            "deputyChairmen": deputyChairmen, 
-            "councillors": councillors
+            "chairmen": result['chairmen'], 
+            "deputyChairmen": result['deputyChairmen'], 
+            "councillors": result['councillors']
         }
     }), 200
 
+SEARCH_COLLECTIONS = {
+    'chairman': 'chairman',
+    'deputy-chairman': 'deputy_chairman',
+    'councillor': 'councillors'
+}
+
+
+# Helper functions for the opaque (createdAt, _id) cursor used by candidate search
+def encode_search_cursor(candidate):
+    created_at = candidate.get('createdAt')
+    key = f"{created_at.isoformat() if created_at else ''}|{candidate['_id']}"
+    return base64.urlsafe_b64encode(key.encode('utf-8')).decode('ascii')
+
+
+def decode_search_cursor(cursor):
+    created_at, _, candidate_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').partition('|')
+    return (datetime.fromisoformat(created_at) if created_at else None), ObjectId(candidate_id)
+
+
+def candidate_search_query(params):
+    query = {}
+    for field in ('localGovernment', 'ward', 'status'):
+        if params.get(field):
+            query[field] = params[field]
+    if params.get('createdFrom') or params.get('createdTo'):
+        query['createdAt'] = {}
+        if params.get('createdFrom'):
+            query['createdAt']['$gte'] = params['createdFrom']
+        if params.get('createdTo'):
+            query['createdAt']['$lte'] = params['createdTo']
+    if params.get('q'):
+        query['$text'] = {'$search': params['q']}
+    if params.get('after'):
+        created_at, candidate_id = decode_search_cursor(params['after'])
+        query['$or'] = [
+            {'createdAt': {'$lt': created_at}},
+            {'createdAt': created_at, '_id': {'$lt': candidate_id}}
+        ]
+    return query
+
+
+@routes_authentication.route('/candidates/search', methods=['GET'])
+@swag_from({
+    'parameters': [
+        {'name': 'position', 'in': 'query', 'type': 'string', 'enum': ['chairman', 'deputy-chairman', 'councillor'], 'required': False, 'description': 'Search one position only'},
+        {'name': 'localGovernment', 'in': 'query', 'type': 'string', 'required': False},
+        {'name': 'ward', 'in': 'query', 'type': 'string', 'required': False},
+        {'name': 'status', 'in': 'query', 'type': 'string', 'enum': ['submitted', 'approved', 'rejected'], 'required': False},
+        {'name': 'createdFrom', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False},
+        {'name': 'createdTo', 'in': 'query', 'type': 'string', 'format': 'date-time', 'required': False},
+        {'name': 'q', 'in': 'query', 'type': 'string', 'required': False, 'description': 'Name search'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Results per page (max 200)'},
+        {'name': 'after', 'in': 'query', 'type': 'string', 'required': False, 'description': 'nextCursor from the previous page'}
+    ],
+    'responses': {
+        200: {
+            'description': 'Matching candidates, newest first',
+            'examples': {
+                'application/json': {
+                    'candidates': [],
+                    'nextCursor': None
+                }
+            }
+        },
+        400: {
+            'description': 'Invalid search parameters'
+        }
+    }
+})
+def search_candidates():
+    try:
+        params = CandidateSearchSchema().load(request.args)
+        query = candidate_search_query(params)
+    except ValidationError as err:
+        return jsonify(err.messages), 400
+    except (ValueError, InvalidId):
+        return jsonify({'message': 'Invalid cursor'}), 400
+
+    limit = params['limit']
+    positions = [params['position']] if params.get('position') else list(SEARCH_COLLECTIONS)
+    sort = [('createdAt', DESCENDING), ('_id', DESCENDING)]
+
+    # each collection is queried on its own indexes; the newest `limit` of the
+    # merged results form the page
+    candidates = []
+    for position in positions:
+        cursor = db[SEARCH_COLLECTIONS[position]].find(query, CANDIDATE_SUMMARY_FIELDS).sort(sort).limit(limit + 1)
+        candidates.extend(cursor)
+    candidates.sort(key=lambda c: (c.get('createdAt') or datetime.min, c['_id']), reverse=True)
+
+    page = candidates[:limit]
+    next_cursor = encode_search_cursor(page[-1]) if len(candidates) > limit else None
+    return jsonify({'candidates': page, 'nextCursor': next_cursor}), 200
+
+
 @routes_authentication.route('/approve-chairman', methods=['POST'])
 @validate_schema(UpdateStatusSchema())
 def approve_chairman():
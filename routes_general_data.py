@@ -1,18 +1,42 @@
-from flask import Blueprint, jsonify, request
-from config import db
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context
+from config import ENCRYPTION_KEY_VOTER_DATA, VOTER_CHUNK_BYTES, db
 from flasgger import swag_from
 import json, os
 from cryptography.fernet import Fernet
+import encoder
+import reference_data
+import voter_bundles
+from datetime import datetime, timezone
 
 routes_general_data = Blueprint('general_data', __name__)
 
 political_parties_collection = db['political_parties']
 
 # Encryption key (should be kept secure and consistent)
-encryption_key = os.getenv('ENCRYPTION_KEY_VOTER_DATA')
+encryption_key = ENCRYPTION_KEY_VOTER_DATA
 encryption_key = encryption_key.encode()
 cipher_suite = Fernet(encryption_key)
 
+
+# Political parties and polling units are loaded with `python seed.py reference`
+def load_political_parties():
+    return {"political_parties": list(political_parties_collection.find(projection={'_id': False}))}
+
+
+def load_wards():
+    with open('data/wards.json') as f:
+        return {"wards": json.load(f)}
+
+
+def load_polling_units():
+    return {"polling_units": list(db.polling_units.find(projection={'_id': False}))}
+
+
+political_parties_data = reference_data.register('political_parties', load_political_parties)
+wards_data = reference_data.register('wards', load_wards)
+polling_units_data = reference_data.register('polling_units', load_polling_units)
+
+
 @routes_general_data.route('/general/political-parties', methods=['GET'])
 @swag_from({
     'responses': {
@@ -30,22 +54,86 @@ cipher_suite = Fernet(encryption_key)
                 }
             }
         },
+        304: {'description': 'Not modified'}
     }
 })
 def get_political_parties():
-    political_parties = list(political_parties_collection.find(
-        projection={'_id': False}))
+    return political_parties_data.response()
+
+
+@routes_general_data.route('/general/wards', methods=['GET'])
+@swag_from({
+    'responses': {
+        200: {
+            'description': 'All wards with their LGA; supports If-None-Match',
+            'examples': {
+                'application/json': {
+                    'wards': [
+                        {
+                            'LGA NAME': 'BARKIN LADI',
+                            'WARD NAME': 'GAFAT',
+                            'WARD CODE': 'GAFAT'
+                        }
+                    ]
+                }
+            }
+        },
+        304: {'description': 'Not modified'}
+    }
+})
+def get_wards():
+    return wards_data.response()
+
+
+@routes_general_data.route('/general/polling-units', methods=['GET'])
+@swag_from({
+    'responses': {
+        200: {
+            'description': 'All polling units; supports If-None-Match',
+            'examples': {
+                'application/json': {
+                    'polling_units': [
+                        {
+                            'id': '1',
+                            'name': 'LADI KASKADI',
+                            'ward': 'BUHIT',
+                            'lga': 'BASSA'
+                        }
+                    ]
+                }
+            }
+        },
+        304: {'description': 'Not modified'}
+    }
+})
+def get_polling_units_reference():
+    return polling_units_data.response()
+
+
+# Helper function to group voters into encrypted frames of roughly
+# VOTER_CHUNK_BYTES of JSON each. Every line of the response is one frame:
+# {"chunk": n, "data": <Fernet token of a JSON array of voters>}, followed by
+# a final {"done": true, "chunks": n, "count": voters, **trailer} line.
+def encrypted_voter_frames(cursor, **trailer):
+    chunk, chunk_size, chunks, count = [], 0, 0, 0
 
-    if len(list(political_parties)) == 0:
-        # upload the political parties data to the database
-        with open('data/political_parties.json') as f:
-            data = json.load(f)
-            political_parties_collection.insert_many(data)
+    def frame():
+        token = cipher_suite.encrypt(('[' + ','.join(chunk) + ']').encode('utf-8'))
+        return json.dumps({'chunk': chunks, 'data': token.decode('ascii')}) + '\n'
 
-        political_parties = list(political_parties_collection.find(projection={'_id': False}))
-        return jsonify({"political_parties": list(political_parties)})
-    
-    return jsonify({"political_parties": list(political_parties)})
+    for voter in cursor:
+        record = encoder.dumps(voter)
+        chunk.append(record)
+        chunk_size += len(record)
+        count += 1
+        if chunk_size >= VOTER_CHUNK_BYTES:
+            yield frame()
+            chunks += 1
+            chunk, chunk_size = [], 0
+    if chunk:
+        yield frame()
+        chunks += 1
+    yield json.dumps({'done': True, 'chunks': chunks, 'count': count, **trailer}) + '\n'
 
 
 @routes_general_data.route('/voters_data', methods=['GET'])
@@ -54,6 +142,8 @@ def get_voters():
     polling_unit = request.args.get('polling_unit')
     ward = request.args.get('ward')
     lga = request.args.get('lga')
+    if not polling_unit or not ward or not lga:
+        return jsonify({'message': 'Please provide polling_unit, ward, and lga'}), 400
 
     # Fetch data from MongoDB
     query = {
@@ -61,12 +151,114 @@ def get_voters():
         "ward": ward,
         "lga": lga
     }
-    results = list(db.voters.find(query, {"_id": 0}))  # Exclude the MongoDB _id field
+    cursor = db.voters.find(query, {"_id": 0, "vinSuffix": 0}).batch_size(1000)
+
+    # Stream encrypted frames as the cursor is read, so memory stays flat and
+    # the first bytes go out before the whole polling unit is loaded
+    return Response(stream_with_context(encrypted_voter_frames(cursor)), mimetype='application/x-ndjson')
+
+
+# Helper function to present a bundle manifest to devices
+def bundle_manifest(manifest):
+    return {
+        'bundleId': manifest['_id'],
+        'lga': manifest.get('lga'),
+        'ward': manifest.get('ward'),
+        'polling_unit': manifest.get('polling_unit'),
+        'version': manifest['version'],
+        'count': manifest['count'],
+        'size': manifest['size'],
+        'etag': manifest['sha256']
+    }
+
+
+@routes_general_data.route('/voter-bundles', methods=['GET'])
+@swag_from({
+    'parameters': [
+        {'name': 'lga', 'in': 'query', 'type': 'string', 'required': False},
+        {'name': 'ward', 'in': 'query', 'type': 'string', 'required': False},
+        {'name': 'polling_unit', 'in': 'query', 'type': 'string', 'required': False}
+    ],
+    'responses': {
+        200: {
+            'description': 'Manifests of the prebuilt voter-register bundles',
+            'examples': {
+                'application/json': {
+                    'bundles': [
+                        {
+                            'bundleId': '3f2a9c0d1e4b5a6c',
+                            'lga': 'WASE',
+                            'ward': 'SALUWE',
+                            'polling_unit': 'SHILUR_MARKET',
+                            'version': 1728345600000,
+                            'count': 412,
+                            'size': 20480,
+                            'etag': 'sha256 of the bundle file'
+                        }
+                    ]
+                }
+            }
+        }
+    }
+})
+def list_voter_bundles():
+    query = {field: request.args[field] for field in voter_bundles.BUNDLE_KEY_FIELDS if request.args.get(field)}
+    manifests = voter_bundles.bundles_collection.find(query).sort([(field, 1) for field in voter_bundles.BUNDLE_KEY_FIELDS])
+    return jsonify({'bundles': [bundle_manifest(manifest) for manifest in manifests]})
 
-    # Convert results to JSON string and then encrypt
-    results_json = json.dumps(results)
-    return jsonify({"data": results_json})
-    # encrypted_results = cipher_suite.encrypt(results_json.encode())
 
-    # Return encrypted data as a response
-    # return jsonify({"data": encrypted_results.decode()})
\ No newline at end of file
+@routes_general_data.route('/voter-bundles/<bundle_id>', methods=['GET'])
+@swag_from({
+    'parameters': [
+        {'name': 'bundle_id', 'in': 'path', 'type': 'string', 'required': True}
+    ],
+    'responses': {
+        200: {'description': 'Fernet-encrypted, gzip-compressed JSON array of voters; supports Range and If-None-Match'},
+        206: {'description': 'Partial content'},
+        304: {'description': 'Not modified'},
+        404: {'description': 'Bundle not found'}
+    }
+})
+def download_voter_bundle(bundle_id):
+    manifest = voter_bundles.bundles_collection.find_one({'_id': bundle_id})
+    if not manifest or not os.path.exists(voter_bundles.bundle_path(bundle_id)):
+        return jsonify({'message': 'Bundle not found'}), 404
+
+    response = send_file(
+        voter_bundles.bundle_path(bundle_id),
+        mimetype='application/octet-stream',
+        etag=manifest['sha256'],
+        conditional=True,
+        max_age=300
+    )
+    response.headers['X-Bundle-Version'] = str(manifest['version'])
+    return response
+
+
+@routes_general_data.route('/voter-bundles/<bundle_id>/delta', methods=['GET'])
+@swag_from({
+    'parameters': [
+        {'name': 'bundle_id', 'in': 'path', 'type': 'string', 'required': True},
+        {'name': 'since', 'in': 'query', 'type': 'integer', 'required': True, 'description': 'Version the device already holds'}
+    ],
+    'responses': {
+        200: {'description': 'Voters updated since the version, in the /voters_data frame format; the final line carries the new version'},
+        400: {'description': 'Invalid version'},
+        404: {'description': 'Bundle not found'}
+    }
+})
+def voter_bundle_delta(bundle_id):
+    try:
+        since = int(request.args.get('since', ''))
+    except ValueError:
+        return jsonify({'message': 'Please provide since, a bundle version'}), 400
+    manifest = voter_bundles.bundles_collection.find_one({'_id': bundle_id})
+    if not manifest:
+        return jsonify({'message': 'Bundle not found'}), 404
+
+    cutoff = datetime.now(timezone.utc)
+    cursor = voter_bundles.voters_changed_since(manifest, since, cutoff)
+    return Response(
+        stream_with_context(encrypted_voter_frames(cursor, version=voter_bundles.to_version(cutoff))),
+        mimetype='application/x-ndjson'
+    )
@@ -1,3 +1,5 @@
+from datetime import timezone
+
 import marshmallow as ma
 
 class ArrestHistorySchema(ma.Schema):
@@ -151,3 +153,47 @@ class UpdateStatusSchema(ma.Schema):
     _id = ma.fields.String(required=True)
     status = ma.fields.String(required=True, validate=ma.validate.OneOf(['approved', 'rejected']))
     
+
+
+class OfflineAccreditationSchema(ma.Schema):
+    class Meta:
+        unknown = ma.EXCLUDE
+
+    clientId = ma.fields.String(required=True, validate=ma.validate.Length(min=1, max=100))
+    vin = ma.fields.String(required=True, validate=ma.validate.Length(min=6))
+    pollingUnit = ma.fields.String()
+    type = ma.fields.String(load_default='manual', validate=ma.validate.OneOf(['auto', 'manual']))
+    status = ma.fields.String(load_default='completed', validate=ma.validate.OneOf(['completed', 'rejected']))
+    accreditedAt = ma.fields.AwareDateTime(default_timezone=timezone.utc)
+    voterCardImage = ma.fields.String()
+    faceCaptureImage = ma.fields.String()
+
+
+class AccreditationSyncSchema(ma.Schema):
+    # records are validated one by one so a bad record, even one that is not
+    # an object, does not reject the batch
+    records = ma.fields.List(ma.fields.Raw(allow_none=True), required=True,
+                             validate=ma.validate.Length(min=1, max=500))
+
+
+class CandidateSearchSchema(ma.Schema):
+    class Meta:
+        unknown = ma.EXCLUDE
+
+    position = ma.fields.String(validate=ma.validate.OneOf(['chairman', 'deputy-chairman', 'councillor']))
+    localGovernment = ma.fields.String()
+    ward = ma.fields.String()
+    status = ma.fields.String(validate=ma.validate.OneOf(['submitted', 'approved', 'rejected']))
+    createdFrom = ma.fields.DateTime()
+    createdTo = ma.fields.DateTime()
+    q = ma.fields.String(validate=ma.validate.Length(min=2, max=100))
+    limit = ma.fields.Integer(load_default=50, validate=ma.validate.Range(min=1, max=200))
+    after = ma.fields.String()
+
+
+class TranslateBatchSchema(ma.Schema):
+    texts = ma.fields.List(
+        ma.fields.String(validate=ma.validate.Length(min=1, max=2000)),
+        required=True,
+        validate=ma.validate.Length(min=1, max=100)
+    )
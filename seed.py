@@ -0,0 +1,181 @@
+import argparse
+import time
+from datetime import datetime, timezone
+
+from bson import json_util
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+import gazetteer
+import reference_data
+from config import db
+from indexes import UNIQUE_KEYS, ensure_indexes
+from json_stream import iter_records
+from voters import prepare_voter
+
+# Loads reference data and the voter register ahead of go-live, so nothing is
+# seeded on first request:
+#
+#     python seed.py reference
+#     python seed.py voters data/voters.ndjson [--batch-size 2000]
+#
+# Files are streamed record by record (a JSON array, or NDJSON for .ndjson /
+# .jsonl) and written as batches of unordered upserts keyed on each dataset's
+# natural key, so an import can be re-run, or resumed after a failure, without
+# duplicating anything. Extended JSON ($oid, $date), as written by mongoexport
+# and benchmarks/synthetic_data.py, is decoded to ObjectIds and datetimes.
+#
+# Before importing, make_keys_unique merges any duplicates of those keys left
+# by earlier loads (the app used to insert_many the data files) and makes
+# them unique indexes.
+
+BATCH_SIZE = 1000
+PROGRESS_EVERY = 100000
+
+DATASETS = {
+    'political_parties': {'key': 'id', 'path': 'data/political_parties.json'},
+    # `id` repeats across wards and is missing on some units
+    'polling_units': {'key': ('ward', 'name', 'state_code'), 'path': 'data/polling_units.json'},
+    'voters': {'key': 'VIN', 'path': 'data/voters.json'},
+    # no files in data/; exports or benchmarks/synthetic_data.py output
+    'users': {'key': 'email', 'path': None},
+    'accreditation': {'key': '_id', 'path': None},
+    'chairman': {'key': '_id', 'path': None},
+    'deputy_chairman': {'key': '_id', 'path': None},
+    'councillors': {'key': '_id', 'path': None},
+}
+REFERENCE_DATASETS = ('political_parties', 'polling_units')
+
+
+def voter_operation(voter, now):
+    voter = prepare_voter(voter)
+    voter.pop('updatedAt')
+    fields = {name: {'$literal': value} for name, value in voter.items()}
+    # updatedAt only moves when the voter actually changed, so re-importing an
+    # unchanged register does not put every voter into the bundle deltas
+    unchanged = {'$and': [{'$eq': [f'${name}', value]} for name, value in fields.items()]}
+    return UpdateOne({'VIN': voter['VIN']}, [
+        {'$set': {'updatedAt': {'$cond': [unchanged, {'$ifNull': ['$updatedAt', now]}, now]}}},
+        {'$set': fields}
+    ], upsert=True)
+
+
+def key_fields(key):
+    return key if isinstance(key, tuple) else (key,)
+
+
+def reference_operation(record, key):
+    fields = {name: value for name, value in record.items() if name != '_id'}
+    # a field missing from the record matches one missing from the document
+    return UpdateOne({field: record.get(field) for field in key_fields(key)}, {'$set': fields}, upsert=True)
+
+
+def dedupe(collection, keys):
+    """Delete all but the oldest document of each key value; returns how
+    many were deleted. Missing and null compare equal, as in an index."""
+    pipeline = [
+        {'$group': {
+            '_id': {field: {'$ifNull': [f'${field}', None]} for field, _ in keys},
+            'ids': {'$push': '$_id'},
+            'count': {'$sum': 1}
+        }},
+        {'$match': {'count': {'$gt': 1}}}
+    ]
+    deleted = 0
+    for group in collection.aggregate(pipeline, allowDiskUse=True):
+        extra = sorted(group['ids'])[1:]
+        deleted += collection.delete_many({'_id': {'$in': extra}}).deleted_count
+    return deleted
+
+
+def make_keys_unique():
+    """Merge duplicate natural keys and build their unique indexes; returns
+    the number of duplicates deleted per collection."""
+    deleted = {}
+    for name, keys in UNIQUE_KEYS.items():
+        collection = db[name]
+        deleted[name] = dedupe(collection, keys)
+        for index_name, info in collection.index_information().items():
+            if info['key'] == keys and not info.get('unique'):
+                collection.drop_index(index_name)
+        collection.create_index(keys, unique=True)
+    return deleted
+
+
+def write_batch(collection, operations, totals):
+    try:
+        result = collection.bulk_write(operations, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        # the rest of the batch is still applied; failed rows can be re-run
+        result = e.details
+        totals['errors'] += len(result['writeErrors'])
+    totals['upserted'] += result['nUpserted']
+    totals['modified'] += result['nModified']
+
+
+def import_dataset(name, path=None, batch_size=BATCH_SIZE):
+    dataset = DATASETS[name]
+    path = path or dataset['path']
+    if not path:
+        raise ValueError(f"{name} has no default file, give a path")
+    collection = db[name]
+    now = datetime.now(timezone.utc)
+
+    totals = {'rows': 0, 'skipped': 0, 'upserted': 0, 'modified': 0, 'errors': 0}
+    operations = []
+    start = time.perf_counter()
+    for record in iter_records(path, object_hook=json_util.object_hook):
+        if not any(record.get(field) for field in key_fields(dataset['key'])):
+            totals['skipped'] += 1
+            continue
+        if name == 'voters':
+            operations.append(voter_operation(record, now))
+        else:
+            operations.append(reference_operation(record, dataset['key']))
+        totals['rows'] += 1
+        if len(operations) >= batch_size:
+            write_batch(collection, operations, totals)
+            operations = []
+        if totals['rows'] % PROGRESS_EVERY == 0:
+            elapsed = time.perf_counter() - start
+            print(f"  {name}: {totals['rows']} rows, {totals['rows'] / elapsed:.0f} rows/s")
+    if operations:
+        write_batch(collection, operations, totals)
+
+    totals['seconds'] = time.perf_counter() - start
+    if name == 'polling_units':
+        # backfill the lga before processes are told to reload the units
+        totals['enrichment'] = gazetteer.enrich_polling_units()
+    if name in REFERENCE_DATASETS:
+        reference_data.bump_version(name)
+    return totals
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Bulk import reference data and voters.')
+    parser.add_argument('dataset', choices=[*DATASETS, 'reference'])
+    parser.add_argument('path', nargs='?', help='JSON array or NDJSON file; defaults to the file in data/')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    names = REFERENCE_DATASETS if args.dataset == 'reference' else [args.dataset]
+    if args.path and len(names) > 1:
+        parser.error('a path can only be given for a single dataset')
+
+    ensure_indexes()
+    for name, count in make_keys_unique().items():
+        if count:
+            print(f"{name}: deleted {count} duplicates of {'/'.join(field for field, _ in UNIQUE_KEYS[name])}")
+    for name in names:
+        totals = import_dataset(name, args.path, args.batch_size)
+        print(f"{name}: {totals['rows']} rows in {totals['seconds']:.1f}s "
+              f"({totals['rows'] / max(totals['seconds'], 1e-9):.0f} rows/s), "
+              f"{totals['upserted']} inserted, {totals['modified']} updated, "
+              f"{totals['skipped']} skipped without {'/'.join(key_fields(DATASETS[name]['key']))}, "
+              f"{totals['errors']} errors")
+        if name == 'polling_units':
+            report = totals['enrichment']
+            print(f"polling_units: filled in the lga of {report['updated']} units, "
+                  f"{len(report['unresolvedWards'])} wards unresolved (see python gazetteer.py --dry-run)")
+        if name == 'voters':
+            print("Rebuild the offline bundles with: python voter_bundles.py")
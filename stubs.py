@@ -0,0 +1,45 @@
+import time
+from types import SimpleNamespace
+
+# Local stand-ins for external clients, selected with OPENAI_CLIENT=stub and
+# TWILIO_CLIENT=stub so the app and its worker pools can run without network
+# access or API keys.
+
+STUB_OCR_REPLY = '{"VIN": "90F5AE896029570221", "DOB": "1989", "full_name": "IKEZE, TOCHUKWU B."}'
+
+
+class StubOpenAIClient:
+    """Quacks like openai.OpenAI for chat.completions.create, returning a
+    canned reply after an optional delay and recording every call."""
+
+    def __init__(self, reply=STUB_OCR_REPLY, delay=0.0):
+        self.reply = reply
+        self.delay = delay
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.delay:
+            time.sleep(self.delay)
+        reply = self.reply(kwargs) if callable(self.reply) else self.reply
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))],
+            usage=SimpleNamespace(prompt_tokens=0, completion_tokens=0, total_tokens=0)
+        )
+
+
+class StubTwilioClient:
+    """Quacks like twilio.rest.Client for messages.create, recording every
+    message instead of sending it. Selected with TWILIO_CLIENT=stub."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+        self.messages = SimpleNamespace(create=self.create)
+
+    def create(self, **kwargs):
+        if self.delay:
+            time.sleep(self.delay)
+        self.sent.append(kwargs)
+        return SimpleNamespace(sid=f"SM{len(self.sent):032d}", status='queued', **kwargs)
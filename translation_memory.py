@@ -0,0 +1,151 @@
+import hashlib
+import logging
+import threading
+import unicodedata
+from datetime import datetime, timezone
+
+from cache import SingleFlight
+from workers import Overloaded
+
+# Translations are remembered per (normalized source text, target language):
+# an in-process LRU in front of a Mongo collection that never expires, so UI
+# labels and FAQ text are translated by the model once. A batch looks every
+# string up first and sends only the misses, in one model call. When the
+# model's batch reply cannot be matched up, up to `fallback_limit` of them are
+# translated one by one on `executor`; the rest come back as None.
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_source(text):
+    return ' '.join(unicodedata.normalize('NFC', str(text)).split())
+
+
+def memory_key(text, language):
+    digest = hashlib.sha256(normalize_source(text).encode('utf-8')).hexdigest()
+    return f"{language.lower()}:{digest}"
+
+
+class MongoTranslationStore:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def get(self, key, default=None):
+        doc = self.collection.find_one({'_id': key}, {'text': 1})
+        return default if doc is None else doc['text']
+
+    def get_many(self, keys):
+        return {doc['_id']: doc['text'] for doc in self.collection.find({'_id': {'$in': list(keys)}}, {'text': 1})}
+
+    def set(self, key, value, source=None, language=None):
+        self.collection.update_one(
+            {'_id': key},
+            {'$set': {'text': value, 'source': source, 'language': language, 'createdAt': datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+
+class TranslationMemory:
+    """`translate(text, language)` and `translate_batch(texts, language)`
+    call the model; both are injected so the memory can run against a stub
+    model client. The injected `translate_batch` returns one translation per
+    text, or None when the model's reply cannot be matched up."""
+
+    def __init__(self, memory, store, translate, translate_batch, executor, fallback_limit=20):
+        self.memory = memory
+        self.store = store
+        self._translate = translate
+        self._translate_batch = translate_batch
+        self.executor = executor
+        self.fallback_limit = fallback_limit
+        self.single_flight = SingleFlight()
+        self._counters = {'memoryHits': 0, 'storeHits': 0, 'misses': 0, 'coalesced': 0,
+                          'batches': 0, 'batchFallbacks': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                self._counters[name] += delta
+
+    def _remember(self, key, source, language, translation):
+        self.memory.set(key, translation)
+        self.store.set(key, translation, source=source, language=language)
+
+    def translate(self, text, language):
+        key = memory_key(text, language)
+        value = self.memory.get(key)
+        if value is not None:
+            self._count(memoryHits=1)
+            return value
+
+        def load():
+            stored = self.store.get(key)
+            if stored is not None:
+                self._count(storeHits=1)
+                self.memory.set(key, stored)
+                return stored
+            self._count(misses=1)
+            source = normalize_source(text)
+            translation = self._translate(source, language)
+            if translation is not None:
+                self._remember(key, source, language, translation)
+            return translation
+
+        value, shared = self.single_flight.do(key, load)
+        if shared:
+            self._count(coalesced=1)
+        return value
+
+    def translate_batch(self, texts, language):
+        keys = [memory_key(text, language) for text in texts]
+        found = {}
+        for key in set(keys):
+            value = self.memory.get(key)
+            if value is not None:
+                found[key] = value
+        memory_hits = len(found)
+        missing = [key for key in set(keys) if key not in found]
+        stored = self.store.get_many(missing) if missing else {}
+        for key, value in stored.items():
+            self.memory.set(key, value)
+            found[key] = value
+
+        # one model call for the distinct strings nobody has translated yet
+        sources = {}
+        for key, text in zip(keys, texts):
+            if key not in found:
+                sources.setdefault(key, normalize_source(text))
+        self._count(batches=1, memoryHits=memory_hits, storeHits=len(stored))
+        if sources:
+            translations = self._translate_batch(list(sources.values()), language)
+            if translations is None or len(translations) != len(sources):
+                logger.warning('Batch translation reply did not match %d strings, translating one by one', len(sources))
+                self._count(batchFallbacks=1)
+                translations = self._translate_each(list(sources.values()), language)
+            else:
+                self._count(misses=len(sources))
+                for (key, source), translation in zip(sources.items(), translations):
+                    if translation is not None:
+                        self._remember(key, source, language, translation)
+            found.update(zip(sources, translations))
+
+        return [found.get(key) for key in keys]
+
+    def _translate_each(self, sources, language):
+        # through translate(), so a string another request is already
+        # translating shares that call; the executor bounds the parallelism
+        futures = []
+        for source in sources[:self.fallback_limit]:
+            try:
+                futures.append(self.executor.submit(self.translate, source, language))
+            except Overloaded:
+                futures.append(None)
+        translations = [future.result() if future else None for future in futures]
+        return translations + [None] * (len(sources) - len(translations))
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['size'] = len(self.memory)
+        return stats
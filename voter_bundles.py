@@ -0,0 +1,108 @@
+import gzip
+import hashlib
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from cryptography.fernet import Fernet
+
+import encoder
+from config import ENCRYPTION_KEY_VOTER_DATA, VOTER_BUNDLE_PATH, db
+
+# Offline voter-register bundles: one gzip-compressed, Fernet-encrypted JSON
+# array of voters per polling unit, built ahead of election day so devices
+# download a static file instead of querying /voters_data live.
+#
+# A bundle's version is the build cutoff in epoch milliseconds. Voters carry
+# `updatedAt` (set by voters.prepare_voter), so a device holding version v
+# catches up with the voters updated after v via the delta endpoint.
+
+bundles_collection = db.voter_bundles
+
+BUNDLE_KEY_FIELDS = ('lga', 'ward', 'polling_unit')
+VOTER_PROJECTION = {'_id': 0, 'vinSuffix': 0}
+
+
+def bundle_id(lga, ward, polling_unit):
+    key = '|'.join(str(value) for value in (lga, ward, polling_unit))
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def bundle_path(bundle):
+    return os.path.join(VOTER_BUNDLE_PATH, f"{bundle}.bundle")
+
+
+def to_version(value):
+    return int(value.timestamp() * 1000)
+
+
+def from_version(version):
+    return datetime.fromtimestamp(int(version) / 1000, tz=timezone.utc)
+
+
+def write_bundle(cipher, key, voters, cutoff):
+    payload = gzip.compress(encoder.dumps_bytes(voters))
+    data = cipher.encrypt(payload)
+
+    bundle = bundle_id(*key)
+    os.makedirs(VOTER_BUNDLE_PATH, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=VOTER_BUNDLE_PATH)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, bundle_path(bundle))
+
+    manifest = {
+        '_id': bundle,
+        **dict(zip(BUNDLE_KEY_FIELDS, key)),
+        'version': to_version(cutoff),
+        'count': len(voters),
+        'size': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(),
+        'builtAt': datetime.now(timezone.utc)
+    }
+    bundles_collection.replace_one({'_id': bundle}, manifest, upsert=True)
+    return manifest
+
+
+def build_bundles(query=None):
+    """Build a bundle for every polling unit matching `query` in one pass over
+    the voters sorted on the (lga, ward, polling_unit) index."""
+    cipher = Fernet(ENCRYPTION_KEY_VOTER_DATA.encode())
+    cutoff = datetime.now(timezone.utc)
+    query = dict(query or {}, updatedAt={'$not': {'$gt': cutoff}})
+    sort = [(field, 1) for field in BUNDLE_KEY_FIELDS]
+
+    manifests = []
+    key, voters = None, []
+    for voter in db.voters.find(query, VOTER_PROJECTION).sort(sort).batch_size(5000):
+        voter_key = tuple(voter.get(field) for field in BUNDLE_KEY_FIELDS)
+        if voter_key != key and voters:
+            manifests.append(write_bundle(cipher, key, voters, cutoff))
+            voters = []
+        key = voter_key
+        voters.append(voter)
+    if voters:
+        manifests.append(write_bundle(cipher, key, voters, cutoff))
+    return manifests
+
+
+def voters_changed_since(manifest, version, cutoff):
+    """Voters of a bundle's polling unit updated after `version`, up to
+    `cutoff`, which becomes the device's new version."""
+    query = {field: manifest[field] for field in BUNDLE_KEY_FIELDS}
+    query['updatedAt'] = {'$gt': from_version(version), '$lte': cutoff}
+    return db.voters.find(query, VOTER_PROJECTION).sort('updatedAt', 1).batch_size(1000)
+
+
+if __name__ == '__main__':
+    query = {}
+    for argument in sys.argv[1:]:
+        field, _, value = argument.lstrip('-').partition('=')
+        if field not in BUNDLE_KEY_FIELDS or not value:
+            print("Usage: python voter_bundles.py [--lga=NAME] [--ward=NAME] [--polling_unit=NAME]")
+            sys.exit(1)
+        query[field] = value
+    manifests = build_bundles(query)
+    print(f"Built {len(manifests)} bundles, {sum(m['count'] for m in manifests)} voters, "
+          f"{sum(m['size'] for m in manifests) / 1024 / 1024:.1f} MiB in {VOTER_BUNDLE_PATH}")
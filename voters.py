@@ -0,0 +1,61 @@
+import sys
+from datetime import datetime, timezone
+
+# Manual accreditation accepts the last 6 characters of a VIN. They are stored
+# as `vinSuffix` so the lookup is an indexed equality match instead of an
+# unanchored suffix regex over the whole register.
+VIN_SUFFIX_LENGTH = 6
+
+
+def normalize_vin(vin):
+    return ''.join(str(vin or '').split()).upper()
+
+
+def vin_suffix(vin):
+    return normalize_vin(vin)[-VIN_SUFFIX_LENGTH:]
+
+
+def vin_query(vin):
+    """Query matching a full VIN exactly, or a 6-character short VIN on its
+    suffix. Returns None for anything shorter."""
+    vin = normalize_vin(vin)
+    if len(vin) > VIN_SUFFIX_LENGTH:
+        return {'VIN': vin}
+    if len(vin) == VIN_SUFFIX_LENGTH:
+        return {'vinSuffix': vin}
+    return None
+
+
+# Helper function to fill in the derived lookup keys before a voter is written.
+# updatedAt drives the offline bundle deltas (see voter_bundles.py).
+def prepare_voter(voter):
+    voter['VIN'] = normalize_vin(voter.get('VIN'))
+    voter['vinSuffix'] = vin_suffix(voter['VIN'])
+    voter['updatedAt'] = datetime.now(timezone.utc)
+    return voter
+
+
+def migrate_vin_suffixes(db):
+    """Backfill `vinSuffix` on voters imported before it existed, in one
+    server-side update."""
+    suffix = {'$substrCP': [
+        {'$toUpper': '$VIN'},
+        {'$max': [0, {'$subtract': [{'$strLenCP': '$VIN'}, VIN_SUFFIX_LENGTH]}]},
+        VIN_SUFFIX_LENGTH
+    ]}
+    result = db.voters.update_many(
+        {'vinSuffix': {'$exists': False}, 'VIN': {'$type': 'string'}},
+        [{'$set': {'vinSuffix': suffix}}]
+    )
+    return result.modified_count
+
+
+if __name__ == '__main__':
+    from config import db
+    from indexes import ensure_indexes
+
+    if '--migrate-vin-suffix' not in sys.argv:
+        print("Usage: python voters.py --migrate-vin-suffix")
+        sys.exit(1)
+    ensure_indexes()
+    print(f"Added vinSuffix to {migrate_vin_suffixes(db)} voters")
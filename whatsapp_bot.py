@@ -1,9 +1,23 @@
 from twilio.rest import Client
 import os
+import threading
+
+from stubs import StubTwilioClient
 
 account_sid = os.getenv("TWILIO_ACCOUNT_SID")
 auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-client = Client(account_sid, auth_token)
+client = None
+client_lock = threading.Lock()
+
+
+# Helper function to create the Twilio client on first delivery, so the API
+# starts without Twilio credentials
+def get_client():
+    global client
+    with client_lock:
+        if client is None:
+            client = StubTwilioClient() if os.getenv("TWILIO_CLIENT") == "stub" else Client(account_sid, auth_token)
+        return client
 
 
 
@@ -12,7 +26,7 @@ def send_whatsapp_message(message, recipient='+2348136694562'):
         print("Log: No recipient provided")
         recipient = '+2348136694562'
     
-    result = client.messages.create(
+    result = get_client().messages.create(
     from_='whatsapp:+14155238886',
     body=message,
     to='whatsapp:' + recipient
@@ -0,0 +1,111 @@
+import logging
+import threading
+from datetime import datetime, timezone
+
+from pymongo.errors import DuplicateKeyError
+
+from cache import TTLCache
+
+# The WhatsApp webhook only records and enqueues an incoming message; answers
+# are generated and sent from a bounded worker pool, so Twilio's webhook
+# timeout and the gunicorn workers never wait on the model. Twilio retries a
+# delivery with the same MessageSid, so each SID is answered once.
+
+logger = logging.getLogger(__name__)
+
+
+class MongoMessageLog:
+    """Seen message SIDs shared by every process. A TTL index on createdAt
+    (see indexes.py) forgets them after WHATSAPP_DEDUPE_TTL."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def add(self, message_sid, sender):
+        try:
+            self.collection.insert_one({'_id': message_sid, 'from': sender, 'createdAt': datetime.now(timezone.utc)})
+        except DuplicateKeyError:
+            return False
+        return True
+
+    def discard(self, message_sid):
+        self.collection.delete_one({'_id': message_sid})
+
+
+class MemoryMessageLog:
+    """Seen message SIDs of this process only (WHATSAPP_DEDUPE=memory).
+    With several gunicorn workers a retried delivery can land on a worker
+    that has not seen it and be answered twice."""
+
+    def __init__(self, ttl):
+        self.seen = TTLCache(maxsize=100000, ttl=ttl)
+        self.lock = threading.Lock()
+
+    def add(self, message_sid, sender):
+        with self.lock:
+            if self.seen.get(message_sid) is not None:
+                return False
+            self.seen.set(message_sid, sender)
+            return True
+
+    def discard(self, message_sid):
+        self.seen.pop(message_sid)
+
+
+def whatsapp_number(sender):
+    # Twilio sends 'whatsapp:+234...'; send_whatsapp_message adds the prefix
+    return sender[len('whatsapp:'):] if sender.startswith('whatsapp:') else sender
+
+
+class WhatsAppReplies:
+    """Answers incoming WhatsApp messages in the background.
+
+    `answer` takes the message text and returns the reply; `send` takes
+    (reply, recipient). Both are injected so the pool can run against stub
+    model and Twilio clients.
+    """
+
+    def __init__(self, answer, send, executor, log):
+        self.answer = answer
+        self.send = send
+        self.executor = executor
+        self.log = log
+        self._counters = {'accepted': 0, 'duplicates': 0, 'delivered': 0, 'failed': 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def enqueue(self, message_sid, sender, body):
+        """Queue a reply. Returns False for a message already seen; raises
+        workers.Overloaded when the queue is full, leaving the SID unseen so
+        Twilio's retry is accepted."""
+        if not self.log.add(message_sid, sender):
+            self._count('duplicates')
+            return False
+        try:
+            self.executor.submit(self._reply, message_sid, whatsapp_number(sender), body)
+        except Exception:
+            self.log.discard(message_sid)
+            raise
+        self._count('accepted')
+        return True
+
+    def _reply(self, message_sid, recipient, body):
+        try:
+            self.send(self.answer(body), recipient=recipient)
+        except Exception:
+            logger.exception('Failed to answer WhatsApp message %s', message_sid)
+            self._count('failed')
+        else:
+            self._count('delivered')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        pool = self.executor.stats()
+        stats.update(queueDepth=pool['queued'], running=pool['running'], rejected=pool['rejected'],
+                     workers=pool['workers'], maxQueue=pool['maxQueue'], avgWaitSeconds=pool['avgWaitSeconds'],
+                     avgRunSeconds=pool['avgRunSeconds'])
+        return stats
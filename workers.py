@@ -0,0 +1,82 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Overloaded(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """Thread pool that admits at most `workers + max_queue` tasks at once and
+    rejects the rest immediately, recording how long tasks waited in the
+    queue separately from how long they ran."""
+
+    def __init__(self, workers, max_queue, name):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.name = name
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'inFlight': 0, 'running': 0,
+                       'waitSeconds': 0.0, 'maxWaitSeconds': 0.0, 'runSeconds': 0.0, 'maxRunSeconds': 0.0}
+
+    def _get_executor(self):
+        # created on first use, so threads exist only after gunicorn forks
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            return self._executor
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise Overloaded(f'{self.name} is overloaded')
+        with self._lock:
+            self._stats['submitted'] += 1
+            self._stats['inFlight'] += 1
+        queued_at = time.perf_counter()
+
+        def run():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._stats['running'] += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._record(started_at - queued_at, time.perf_counter() - started_at)
+                self._slots.release()
+
+        try:
+            return self._get_executor().submit(run)
+        except Exception:
+            self._slots.release()
+            with self._lock:
+                self._stats['inFlight'] -= 1
+            raise
+
+    def run(self, fn, *args, timeout=None, **kwargs):
+        return self.submit(fn, *args, **kwargs).result(timeout=timeout)
+
+    def _record(self, wait, elapsed):
+        with self._lock:
+            stats = self._stats
+            stats['completed'] += 1
+            stats['inFlight'] -= 1
+            stats['running'] -= 1
+            stats['waitSeconds'] += wait
+            stats['runSeconds'] += elapsed
+            stats['maxWaitSeconds'] = max(stats['maxWaitSeconds'], wait)
+            stats['maxRunSeconds'] = max(stats['maxRunSeconds'], elapsed)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        completed = stats['completed'] or 1
+        stats['avgWaitSeconds'] = stats['waitSeconds'] / completed
+        stats['avgRunSeconds'] = stats['runSeconds'] / completed
+        stats['queued'] = stats['inFlight'] - stats['running']
+        stats.update(workers=self.workers, maxQueue=self.max_queue)
+        return stats